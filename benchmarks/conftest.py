@@ -0,0 +1,32 @@
+"""
+Benchmarks of the analysis pipeline, the quantities and the table writers. They need pytest-benchmark:
+
+    pip install pytest-benchmark
+    python -m pytest benchmarks --benchmark-json=benchmark.json
+
+The size of the generated data can be changed with the environment variable BENCH_SCALE, ex: BENCH_SCALE=10.
+"""
+
+from pathlib import Path
+import os
+import sys
+
+import pytest
+
+ROOT = Path(__file__).parents[1]
+for p in (ROOT / "src", ROOT / "test"):
+    if str(p) not in sys.path:
+        sys.path.insert(0, str(p))
+
+os.environ.setdefault("MPLBACKEND", "Agg")  # AC_synthesis is benchmarked without a window
+
+SCALE = float(os.environ.get("BENCH_SCALE", "1"))
+
+
+def scaled(n: int) -> int:
+    return max(1, int(n * SCALE))
+
+
+@pytest.fixture(scope="session")
+def data_dir(tmp_path_factory):
+    return tmp_path_factory.mktemp("bench")
@@ -0,0 +1,27 @@
+"""Synthetic data for the benchmarks."""
+
+from pathlib import Path
+
+from make_tdms import synthesis_channels, write_synthesis_tdms
+
+
+def write_tag_tree(root: Path, n_top: int = 10, n_dirs: int = 20, n_files: int = 20, project: str = "proj", every: int = 5):
+    """A server like folder tree, root/<year>/<experiment>/<files>, where every n-th experiment has a project tag.
+
+    Returns:
+        int: number of tagged folders.
+    """
+    tagged = 0
+    for i in range(n_top):
+        for j in range(n_dirs):
+            d = Path(root) / f"{2000 + i}" / f"GW_exp{j:04d}" / "raw"
+            d.mkdir(parents=True, exist_ok=True)
+            for k in range(n_files):
+                (d / f"scan_{k:04d}.tdms").touch()
+            if j % every == 0:
+                (d.parent / f"{project}.tag").touch()
+                tagged += 1
+    return tagged
+
+
+__all__ = ["synthesis_channels", "write_synthesis_tdms", "write_tag_tree"]
@@ -0,0 +1,50 @@
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from conftest import scaled
+from generators import synthesis_channels, write_synthesis_tdms
+from arenz_group_python import AutoClaveSynthesis
+from arenz_group_python.data_treatment.util_filter import clean_outliers
+
+SAMPLES = [scaled(10_000), scaled(100_000)]
+
+
+@pytest.fixture(scope="module", params=SAMPLES, ids=lambda n: f"{n}_samples")
+def tdms_file(request, data_dir):
+    path = data_dir / f"synthesis_{request.param}.tdms"
+    if not path.exists():
+        write_synthesis_tdms(path, request.param, segments=10)
+    return path
+
+
+def test_load(benchmark, tdms_file):
+    benchmark(AutoClaveSynthesis, tdms_file)
+
+
+def test_load_lazy(benchmark, tdms_file):
+    benchmark(AutoClaveSynthesis, tdms_file, lazy=True)
+
+
+@pytest.mark.parametrize("method", ["mean", "median"])
+@pytest.mark.parametrize("n_samples", SAMPLES)
+def test_clean_outliers(benchmark, n_samples, method):
+    data = synthesis_channels(n_samples)["T_Reactor"]
+    benchmark(clean_outliers, data, 20, 1, method)
+
+
+def test_AC_synthesis_metrics(benchmark, tdms_file):
+    synthesis = AutoClaveSynthesis(tdms_file)
+    benchmark(synthesis.AC_synthesis_metrics)
+
+
+def test_AC_synthesis_headless(benchmark, tdms_file):
+    import matplotlib.pyplot as plt
+
+    synthesis = AutoClaveSynthesis(tdms_file)
+
+    def run():
+        synthesis.AC_synthesis()
+        plt.close("all")
+
+    benchmark(run)
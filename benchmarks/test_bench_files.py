@@ -0,0 +1,46 @@
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+import os
+import subprocess
+import sys
+
+from conftest import ROOT, scaled
+from generators import write_tag_tree
+from arenz_group_python import save_dict_to_tableFile, TableStore
+from arenz_group_python.file.file_dict import open_dict_from_tablefile
+from arenz_group_python.project.util_paths import find_dirs_with_tags
+
+PROPERTIES = {"T": "1.500e+02 °C", "P": "1.2 bar", "rate": 2.5, "note": "ok"}
+
+
+@pytest.mark.parametrize("n_rows", [scaled(100), scaled(1_000), scaled(10_000)])
+def test_save_dict_to_tableFile(benchmark, tmp_path, n_rows):
+    path = tmp_path / "extracted_values.csv"
+    with TableStore(path) as table:
+        table.upsert_many({f"sample {i}": PROPERTIES for i in range(n_rows)})
+    names = iter(range(10**9))
+    benchmark(lambda: save_dict_to_tableFile(path, f"new {next(names)}", PROPERTIES))
+
+
+@pytest.mark.parametrize("n_rows", [scaled(10_000), scaled(100_000)])
+def test_open_dict_from_tablefile(benchmark, tmp_path, n_rows):
+    path = tmp_path / "extracted_values.csv"
+    with TableStore(path) as table:
+        table.upsert_many({f"sample {i}": PROPERTIES for i in range(n_rows)})
+    benchmark(open_dict_from_tablefile, path)
+
+
+def test_find_dirs_with_tags(benchmark, tmp_path):
+    tagged = write_tag_tree(tmp_path, n_top=scaled(10))
+    dirs = benchmark(find_dirs_with_tags, tmp_path, "GW", "proj")
+    assert len(dirs) == tagged
+
+
+@pytest.mark.parametrize("statement", ["import arenz_group_python", "from arenz_group_python import Project_Paths",
+                                       "from arenz_group_python import AutoClaveSynthesis"])
+def test_import_time(benchmark, statement):
+    # the package of this tree, also without an installed copy.
+    env = dict(os.environ, PYTHONPATH=str(ROOT / "src"))
+    benchmark.pedantic(subprocess.run, args=([sys.executable, "-c", statement],), kwargs={"check": True, "env": env}, rounds=5)
@@ -0,0 +1,48 @@
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+import numpy as np
+
+from conftest import scaled
+from arenz_group_python import Quantity_Value_Unit as Q, QuantityArray
+from arenz_group_python.data_treatment.util import parse_unit
+from arenz_group_python.data_treatment.units import convert
+
+UNITS = ["m", "mol /L", "kg m^2 s^-2", "°C /min", "bar /min", "V A", "mA cm^-2"]
+
+
+def test_parse_quantity(benchmark):
+    texts = [f"{i * 0.5} {UNITS[i % len(UNITS)]}" for i in range(scaled(1000))]
+    benchmark(lambda: [Q(t) for t in texts])
+
+
+def test_parse_unit_uncached(benchmark):
+    def run():
+        parse_unit.cache_clear()
+        return [parse_unit(u) for u in UNITS]
+    benchmark(run)
+
+
+def test_arithmetic(benchmark):
+    a, b = Q(1.5, "mol /L"), Q(2.0, "L")
+    c, d = Q(3.0, "bar"), Q(200.0, "kPa")
+
+    def run():
+        for _ in range(scaled(1000)):
+            a * b
+            a / b
+            c + d
+            c - d
+    benchmark(run)
+
+
+def test_quantity_array(benchmark):
+    a = QuantityArray(np.linspace(0, 1, scaled(1_000_000)), "bar")
+    b = QuantityArray(np.linspace(1, 2, scaled(1_000_000)), "kPa")
+    benchmark(lambda: (a + b) * a)
+
+
+def test_convert(benchmark):
+    values = np.linspace(250, 500, scaled(1_000_000))
+    benchmark(convert, values, "K", "°C")
@@ -4,9 +4,24 @@
 #from any import EC_Data
 
 
-from .project.util_paths import Project_Paths
-from .file.file_dict import save_dict_to_file, load_dict_from_file, save_dict_to_tableFile
-from .data_treatment import AutoClaveSynthesis
+# The public names are imported when they are used for the first time, see _lazy.py.
+from ._lazy import lazy_getattr
+
+_LAZY_NAMES = {
+    "Project_Paths": ".project.util_paths",
+    "save_dict_to_file": ".file.file_dict",
+    "load_dict_from_file": ".file.file_dict",
+    "save_dict_to_tableFile": ".file.file_dict",
+    "TableStore": ".file.table_store",
+    "save_key_values": ".file.key_values_to_file",
+    "load_key_values": ".file.key_values_to_file",
+    "AutoClaveSynthesis": ".data_treatment.autoclave_synthesis",
+    "AC_synthesis_batch": ".data_treatment.autoclave_batch",
+    "Quantity_Value_Unit": ".data_treatment.util",
+    "QuantityArray": ".data_treatment.util",
+}
+
+__getattr__, __dir__ = lazy_getattr(globals(), _LAZY_NAMES, submodules=("project", "file", "data_treatment", "instrumentation"))
 #from .data_treatment import EC_Data,EC_Datas,CV_Data,CV_Datas,AutoClaveSynthesis
 
 
@@ -21,8 +36,10 @@ __version__ = "0.0.100"
 
 __all__ = ["Project_Paths",
             #"ec_data","EC_Data","EC_Datas","CV_Data","CV_Datas",
-            "AutoClaveSynthesis", 
-            "save_dict_to_file","load_dict_from_file", "save_dict_to_tableFile"
+            "AutoClaveSynthesis", "AC_synthesis_batch",
+            "Quantity_Value_Unit", "QuantityArray",
+            "save_dict_to_file","load_dict_from_file", "save_dict_to_tableFile", "TableStore",
+            "save_key_values", "load_key_values",
            ]
 
 
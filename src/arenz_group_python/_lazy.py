@@ -0,0 +1,45 @@
+"""
+Lazy imports of the public names of a package (PEP 562).
+
+The module that defines a name is only imported when the name is used for the first time,
+ex: nptdms, scipy and matplotlib are not imported by scripts that only use Project_Paths.
+"""
+
+import importlib
+
+
+def lazy_getattr(package_globals: dict, names: dict, fallbacks: tuple = (), submodules: tuple = ()):
+    """Creates the module __getattr__ and __dir__ of a package.
+
+        __getattr__, __dir__ = lazy_getattr(globals(), {"Project_Paths": ".project.util_paths"})
+
+    Args:
+        package_globals (dict): globals() of the package.
+        names (dict): public name and the module that defines it, relative to the package.
+        fallbacks (tuple, optional): modules that are searched, in this order, for names that are not in names.
+        submodules (tuple, optional): names of submodules that can be used as attributes without importing them.
+    """
+    package = package_globals["__name__"]
+
+    def __getattr__(name: str):
+        if name in names:
+            value = getattr(importlib.import_module(names[name], package), name)
+        elif name.startswith("__"):
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        elif name in submodules:
+            value = importlib.import_module(f".{name}", package)
+        else:
+            for module in fallbacks:
+                module = importlib.import_module(module, package)
+                if hasattr(module, name):
+                    value = getattr(module, name)
+                    break
+            else:
+                raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        package_globals[name] = value  # the next lookup does not call __getattr__
+        return value
+
+    def __dir__():
+        return sorted(set(package_globals) | set(names) | set(submodules))
+
+    return __getattr__, __dir__
@@ -5,19 +5,33 @@ Data treatment
 
 __all__ = [
     #"EC_Data","EC_Datas", "ec_data","CV_Data","CV_Datas",
-     "AutoClaveSynthesis",
-     "Quantity_Value_Unit"]
+     "AutoClaveSynthesis", "AC_synthesis_batch", "TdmsChannelCache", "AutoClaveMonitor",
+     "Quantity_Value_Unit", "QuantityArray"]
 
 
 #from .ec_data import EC_Data 
 #from .ec_datas import EC_Datas 
 #from .cv_data import CV_Data
 #from .cv_datas import CV_Datas 
-from .autoclave_synthesis import AutoClaveSynthesis 
-from .util import Quantity_Value_Unit 
-from .util import * 
-#from ..project.util_paths import Project_Paths 
-from .util_graph import * 
+# The names are imported when they are used for the first time, see _lazy.py.
+from .._lazy import lazy_getattr
+
+_LAZY_NAMES = {
+    "AutoClaveSynthesis": ".autoclave_synthesis",
+    "AC_synthesis_batch": ".autoclave_batch",
+    "TdmsChannelCache": ".tdms_cache",
+    "AutoClaveMonitor": ".autoclave_monitor",
+    "Quantity_Value_Unit": ".util",
+    "QuantityArray": ".util",
+    "clean_outliers": ".util_filter",
+    "rolling_mean_std": ".util_filter",
+    "rolling_median_mad": ".util_filter",
+    "convert": ".units",
+    "conversion_factor": ".units",
+}
+
+# the other names of util and util_graph, which used to be imported with "import *".
+__getattr__, __dir__ = lazy_getattr(globals(), _LAZY_NAMES, fallbacks=(".util", ".util_graph"))
 
 
 
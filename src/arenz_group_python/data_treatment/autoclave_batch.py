@@ -0,0 +1,77 @@
+"""
+Batch analysis of autoclave synthesis logs.
+
+The TDMS files are analysed in parallel in a process pool, without any plotting.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import glob
+import os
+
+import pandas as pd
+
+from .autoclave_synthesis import AutoClaveSynthesis
+
+TDMS_PATTERN = "*.tdms"
+
+
+def find_tdms_files(path) -> list[Path]:
+    """Finds the TDMS files.
+
+    Args:
+        path (Path | str | list): a directory (searched recursively), a glob pattern, a file or a list of files.
+
+    Returns:
+        list[Path]: sorted list of paths.
+    """
+    if isinstance(path, (list, tuple)):
+        return [Path(p) for p in path]
+    p = Path(path)
+    if p.is_dir():
+        files = p.rglob(TDMS_PATTERN)
+    elif p.is_file():
+        files = [p]
+    else:
+        files = [Path(f) for f in glob.glob(str(path), recursive=True)]
+    return sorted(f for f in files if f.suffix == ".tdms")
+
+
+def _AC_synthesis_parameters(path: Path, kwargs: dict):
+    """Worker function, returns the parameters of one file or None if the file could not be analysed."""
+    try:
+        with AutoClaveSynthesis(path, lazy=True) as ac:
+            parameters = {"name": ac.name, "path": str(path)}
+            parameters.update(ac.get_parameters(**kwargs))
+        return parameters
+    except Exception as e:
+        print(f"{path} could not be analysed: {e}")
+        return None
+
+
+def AC_synthesis_batch(path, max_workers: int = None, **kwargs) -> pd.DataFrame:
+    """Extracts the synthesis parameters of all autoclave TDMS files in a directory, without plotting.
+
+    Ex:
+        df = AC_synthesis_batch(Project_Paths().rawdata_path)
+
+    Args:
+        path (Path | str | list): a directory (searched recursively), a glob pattern or a list of files.
+        max_workers (int, optional): number of processes. Defaults to the number of cores.
+            Use 1 to run in the current process.
+        kwargs: options passed on to AutoClaveSynthesis.get_parameters.
+
+    Returns:
+        DataFrame: one row per file. The first column is "name".
+    """
+    files = find_tdms_files(path)
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, len(files)))
+    if max_workers == 1:
+        rows = [_AC_synthesis_parameters(f, kwargs) for f in files]
+    else:
+        chunksize = max(1, len(files) // (4 * max_workers))
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            rows = list(executor.map(_AC_synthesis_parameters, files, [kwargs] * len(files), chunksize=chunksize))
+    return pd.DataFrame([row for row in rows if row is not None], columns=None if any(rows) else ["name", "path"])
@@ -0,0 +1,197 @@
+"""
+Incremental analysis of autoclave synthesis logs that are still being written.
+
+Only the samples appended since the last update are read and processed, and the running values are updated.
+The metadata of the file is read again at each update, i.e. an update still takes a little longer
+the more segments the file has, but the data of the earlier segments is not read again.
+"""
+
+from bisect import bisect_left
+from pathlib import Path
+import os
+import time
+
+import numpy as np
+from nptdms import TdmsFile
+
+from .autoclave_synthesis import CHANNELS, CHANNEL_UNITS, SYNTHESIS_GROUP
+from .util_filter import clean_outliers
+from .util import Quantity_Value_Unit as Q
+from .units import convert
+
+
+class AutoClaveMonitor:
+    """Running synthesis parameters of a TDMS log that is still being written.
+
+        monitor = AutoClaveMonitor(path)
+
+        for metrics in monitor.watch(interval=5):
+            print(metrics["Max_Temperature_of_Reactor"])
+
+    The temperature is cleaned from outliers but not smoothed, so the values can differ slightly from AC_synthesis.
+    The cleaned temperature is the same as clean_outliers of the whole file: the last window_size//2 samples,
+    whose window is not complete yet, are cleaned again at the next update.
+    """
+
+    def __init__(self, path: Path, set_temperature: float = None, window_size: int = 20, threshold: float = 1):
+        """
+        Args:
+            path (Path): path to the TDMS file.
+            set_temperature (float, optional): set temperature in °C. Defaults to None,
+                i.e. the max temperature rounded to the nearest multiple of 25 as in AC_synthesis.
+            window_size (int, optional): window size of the outlier cleaning. Defaults to 20.
+            threshold (float, optional): threshold of the outlier cleaning. Defaults to 1.
+        """
+        self.path = Path(path)
+        self.name = ""
+        self.set_temperature = set_temperature
+        self.window_size = window_size
+        self.threshold = threshold
+        self.samples = 0
+        self._file_size = -1
+        # the raw temperature from the start of the window of the first sample that is not final.
+        self._temp_buffer = np.array([])
+        self._buffer_start = 0
+        # samples before this index have a complete window, i.e. their cleaned value does not change anymore.
+        self._final = 0
+        self._pending_time = np.array([])
+        self._pending_temp = np.array([])
+        # running max of the final temperature: the times and values where a new max was reached.
+        self._max_temp_time = []
+        self._max_temp = []
+        self._first = None
+        self._last_time = 0.0
+        self._max_pressure = -np.inf
+        self._max_pressure_time = 0.0
+        self._max_rot = 0.0
+
+    #####################################################################################################################
+    def _read_new_samples(self):
+        """Returns the samples appended since the last read, or None if the file has not grown."""
+        size = os.stat(self.path).st_size
+        if size == self._file_size:
+            return None
+        with TdmsFile.open(self.path) as tdms_file:
+            group = tdms_file[SYNTHESIS_GROUP]
+            length = min(len(group[channel]) for channel in CHANNELS.values())
+            if length <= self.samples:
+                self._file_size = size
+                return None
+            new = {attr: group[channel].read_data(self.samples, length - self.samples) for attr, channel in CHANNELS.items()}
+            self.name = tdms_file.properties.get('name', self.path.stem)
+        self._file_size = size
+        self.samples = length
+        return new
+
+    def update(self):
+        """Reads the new samples and updates the running values.
+
+        Returns:
+            dict: the current synthesis parameters, see metrics().
+        """
+        try:
+            new = self._read_new_samples()
+        except (ValueError, EOFError, OSError) as e:
+            # the last segment might not be completely written yet. Try again at the next update.
+            print(f"TDMS file could not be read: {e}")
+            new = None
+        if new is not None:
+            self._update_values(new)
+        return self.metrics()
+
+    def _update_values(self, new: dict):
+        time_min = convert(np.asarray(new["Time"], dtype=float), CHANNEL_UNITS["Time"], "min")
+        temp = convert(np.asarray(new["Temp_R"], dtype=float), CHANNEL_UNITS["Temp_R"], "°C")
+        pressure = convert(np.asarray(new["Overpressure"], dtype=float), CHANNEL_UNITS["Overpressure"], "bar")
+        if self._first is None:
+            self._first = (temp[0], pressure[0])
+        # the window of sample i is [i - half_window, i + half_window), see util_filter.
+        # the samples that are not final yet are cleaned again, together with the new samples.
+        half_window = int(self.window_size) // 2
+        buffer = np.concatenate((self._temp_buffer, temp))
+        times = np.concatenate((self._pending_time, time_min))
+        cleaned = clean_outliers(buffer, self.window_size, self.threshold)[self._final - self._buffer_start:]
+        final = min(self.samples, max(self._final, self.samples - half_window + 1))
+        n_final = final - self._final
+        self._add_to_running_max(times[:n_final], cleaned[:n_final])
+        self._pending_time = times[n_final:]
+        self._pending_temp = cleaned[n_final:]
+        self._final = final
+        start = max(0, final - half_window)
+        self._temp_buffer = buffer[start - self._buffer_start:]
+        self._buffer_start = start
+
+        index = pressure.argmax()
+        if pressure[index] > self._max_pressure:
+            self._max_pressure = float(pressure[index])
+            self._max_pressure_time = float(time_min[index])
+        self._max_rot = max(self._max_rot, float(np.max(new["Rot"])))
+        self._last_time = float(time_min[-1])
+
+    def _add_to_running_max(self, time_min, temp):
+        if len(temp) == 0:
+            return
+        running_max = np.maximum.accumulate(temp)
+        previous_max = self._max_temp[-1] if self._max_temp else -np.inf
+        new_max = (running_max > previous_max) & np.concatenate(([True], running_max[1:] > running_max[:-1]))
+        self._max_temp_time.extend(time_min[new_max].tolist())
+        self._max_temp.extend(running_max[new_max].tolist())
+
+    #####################################################################################################################
+    def metrics(self):
+        """The current synthesis parameters.
+
+        Returns:
+            dict: the values as Quantity_Value_Unit, with the same keys as AutoClaveSynthesis.AC_synthesis_metrics.
+        """
+        if not self._max_temp and not len(self._pending_temp):
+            return {}
+        # the samples that are not final are included with their current value.
+        max_temperature = max(self._max_temp[-1] if self._max_temp else -np.inf, 
+                              np.max(self._pending_temp, initial=-np.inf))
+        set_temperature = self.set_temperature
+        if set_temperature is None:
+            set_temperature = round(round(max_temperature, 2) / 25) * 25
+        index = bisect_left(self._max_temp, set_temperature)
+        if index < len(self._max_temp):
+            time_set_temp = self._max_temp_time[index]
+        elif (self._pending_temp >= set_temperature).any():
+            time_set_temp = float(self._pending_time[np.argmax(self._pending_temp >= set_temperature)])
+        else:
+            time_set_temp = self._last_time
+        temp_0, pressure_0 = self._first
+        return {
+            "Set_Temperature": Q(set_temperature, "°C"),
+            "Max_Temperature_of_Reactor": Q(max_temperature, "°C"),
+            "Time_to_Set_Temperature": Q(time_set_temp, "min"),
+            "Heating_Rate": Q((set_temperature - temp_0) / time_set_temp if time_set_temp else np.nan, "°C /min"),
+            "Max_Overpressure": Q(self._max_pressure, "bar"),
+            "Time_to_Max_Overpressure": Q(self._max_pressure_time, "min"),
+            "Pressure_Increase_Rate": Q((self._max_pressure - pressure_0) / self._max_pressure_time if self._max_pressure_time else np.nan, "bar /min"),
+            "Rotation_Rate": Q(self._max_rot, "rpm"),
+            "Duration": Q(self._last_time, "min"),
+        }
+
+    def watch(self, interval: float = 5.0, callback = None, timeout: float = None):
+        """Polls the file and yields the synthesis parameters each time new samples were appended.
+
+        Args:
+            interval (float, optional): time between polls in seconds. Defaults to 5.0.
+            callback (callable, optional): called with the parameters each time they are updated.
+            timeout (float, optional): stop when the file has not grown for this many seconds. Defaults to None, i.e. never.
+
+        Yields:
+            dict: the current synthesis parameters.
+        """
+        last_change = time.monotonic()
+        while True:
+            samples = self.samples
+            metrics = self.update()
+            if self.samples != samples:
+                last_change = time.monotonic()
+                if callback is not None:
+                    callback(metrics)
+                yield metrics
+            elif timeout is not None and time.monotonic() - last_change > timeout:
+                return
+            time.sleep(interval)
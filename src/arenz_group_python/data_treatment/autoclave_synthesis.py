@@ -1,87 +1,232 @@
 import numpy as np
 #from scipy.signal import savgol_filter
 #import matplotlib.pyplot as plt
-import pandas as pd
 from nptdms import TdmsFile
 from scipy.signal import savgol_filter
-import matplotlib.pyplot as plt
 
 from .util_graph import plot_options
+from .util_filter import clean_outliers
+from .util import Quantity_Value_Unit as Q
+from .tdms_cache import TdmsChannelCache
+from .units import convert, OFFSETS, UNITS
+from ..instrumentation import stage, instrumented
+
+# kept for compatibility, the channels are converted with units.convert.
+K_TO_DEGC = OFFSETS["°C"]
+PA_TO_BAR = UNITS["bar"][0]
+
+SYNTHESIS_GROUP = "Synthesis"
+CHANNELS = {
+    "Time": "Time",
+    "Temp_R": "T_Reactor",
+    "Temp_HP": "T_HotPlate",
+    "Overpressure": "P_Reactor",
+    "Rot": "Rot",
+    }
+"""Attribute name and the corresponding TDMS channel in the "Synthesis" group."""
+
+CHANNEL_UNITS = {
+    "Time": "s",
+    "Temp_R": "K",
+    "Temp_HP": "K",
+    "Overpressure": "Pa",
+    "Rot": "rpm",
+    }
+"""Unit of the data in the TDMS channels."""
+
+CHUNK_SIZE = 100000
+
+AC_SYNTHESIS_OPTIONS = {
+    'time_smooth': 0,
+    'pressure_smooth': 0,
+    'pressure_median': 0,
+    "temp_smooth": 10,
+    "temp_median" : 7,
+    "temp_channel": "T_Reactor_in_C",
+    }
+
+
+def _channel_property(attr: str):
+    """The data of a channel is read from the TDMS file when it is first used."""
+    def getter(self):
+        if attr not in self._data:
+            self._data[attr] = self._read_channel(attr)
+        return self._data[attr]
+
+    def setter(self, value):
+        self._data[attr] = value
+
+    return property(getter, setter)
 
-K_TO_DEGC = 273.15
-PA_TO_BAR = 1.0e5
 
 class AutoClaveSynthesis:
     
-    def __init__(self, path):
-        self.Time = []
-        self.Temp_R = []
-        self.Temp_HP = []
+    @instrumented("AutoClaveSynthesis.load")
+    def __init__(self, path, lazy: bool = False, memmap_dir = None, cache = None):
+        """Load an autoclave synthesis log.
+
+        Args:
+            path (Path): path to the TDMS file.
+            lazy (bool, optional): only read the metadata when the object is created. 
+                The channels are read from the file when they are first used. Defaults to False.
+            memmap_dir (Path, optional): directory for memory mapped channel data. 
+                Only used if lazy is False. Defaults to None.
+            cache (TdmsChannelCache | bool, optional): cache of the extracted channels. 
+                Use True for the default cache in the project folder. Defaults to None, i.e. no cache.
+        """
+        self._data = {}
+        self._tdms_file = None
+        self._closed = False
         self.Temp_set = []
-        self.Overpressure = []
-        self.Rot = []
         self.path = ""
 
+        if cache is True:
+            cache = TdmsChannelCache()
         try:
-            tdms_file = TdmsFile.read(path)
-            tdms_file.close()
+            if cache:
+                self._load_with_cache(path, cache)
+                return
+            if lazy:
+                tdms_file = TdmsFile.open(path)
+                self._tdms_file = tdms_file
+                for channel in CHANNELS.values():
+                    tdms_file[SYNTHESIS_GROUP][channel]
+            else:
+                tdms_file = TdmsFile.read(path, memmap_dir=memmap_dir)
+                tdms_file.close()
+                for attr, channel in CHANNELS.items():
+                    self._data[attr] = tdms_file[SYNTHESIS_GROUP][channel].data
             self.path = str(path)
-            self.Time = (tdms_file['Synthesis']['Time'].data)
-            self.Temp_R = (tdms_file['Synthesis']['T_Reactor'].data)
-            self.Temp_HP = (tdms_file['Synthesis']['T_HotPlate'].data)
-            self.Overpressure = (tdms_file["Synthesis"]["P_Reactor"].data)
-            self.Rot = tdms_file['Synthesis']['Rot'].data
             self.name = tdms_file.properties['name']
 
         except FileNotFoundError:
             print(f"TDMS file was not found: {path}")
         except KeyError as e:
             print(f"TDMS error: {e}")
+            # the file is kept open in lazy mode.
+            if self._tdms_file is not None:
+                self._tdms_file.close()
+                self._tdms_file = None
+
+    def _load_with_cache(self, path, cache):
+        """The channels are memory mapped from the cache. The file is only read if it is not in the cache."""
+        cached = cache.load(path)
+        if cached is None:
+            with TdmsFile.open(path) as tdms_file:
+                channels = {attr: tdms_file[SYNTHESIS_GROUP][channel].read_data() for attr, channel in CHANNELS.items()}
+                properties = {"name": tdms_file.properties['name']}
+            cache.store(path, channels, properties)
+            cached = cache.load(path) or (channels, properties)
+        self._data, properties = cached
+        self.path = str(path)
+        self.name = properties['name']
+
+    Time = _channel_property("Time")
+    Temp_R = _channel_property("Temp_R")
+    Temp_HP = _channel_property("Temp_HP")
+    Overpressure = _channel_property("Overpressure")
+    Rot = _channel_property("Rot")
 
     def __str__(self):
         return f"{self.name}"
-    
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Closes the TDMS file if it was opened in lazy mode."""
+        if self._tdms_file is not None:
+            self._tdms_file.close()
+            self._tdms_file = None
+            self._closed = True
+
+    def _read_channel(self, attr: str, offset: int = 0, length: int = None):
+        if self._tdms_file is None:
+            if attr in self._data:
+                data = self._data[attr]
+                end = None if length is None else offset + length
+                return data[offset:end]
+            if self._closed:
+                raise ValueError(f"The TDMS file {self.path} is closed, the channel {CHANNELS[attr]} was not read before.")
+            return np.array([])
+        return self._tdms_file[SYNTHESIS_GROUP][CHANNELS[attr]].read_data(offset, length)
+
     #####################################################################################################################
-    def get_channel(self, datachannel: str):
+    def _channel_info(self, datachannel: str):
+        """Returns the attribute, the quantity and the unit of the channel."""
         match datachannel:
             case "Time":
-                return self.Time, "t", "s"
+                return "Time", "t", "s"
             case "Time_in_min":
-                return self.Time / 60.0, "t", "min"
+                return "Time", "t", "min"
             case "T_Reactor":
-                return self.Temp_R, "T", "K"
+                return "Temp_R", "T", "K"
             case "T_Reactor_in_C":
-                return self.Temp_R - K_TO_DEGC, "T", "°C"
+                return "Temp_R", "T", "°C"
             case "T_HotPlate":
-                return self.Temp_HP, "T", "K"
+                return "Temp_HP", "T", "K"
             case "T_HotPlate_in_C":
-                return self.Temp_HP - K_TO_DEGC, "T", "°C"
+                return "Temp_HP", "T", "°C"
             case "P_Reactor":
-                return self.Overpressure, "P", "Pa"
+                return "Overpressure", "P", "Pa"
             case "P_Reactor_in_bar":
-                return self.Overpressure / PA_TO_BAR , "P", "bar"
+                return "Overpressure", "P", "bar"
             case "Rot":
-                return self.Rot, "v", "rpm"
+                return "Rot", "v", "rpm"
             case _:
                 raise NameError("The channel name is not supported")
+
+    def get_channel(self, datachannel: str):
+        attr, quantity, unit = self._channel_info(datachannel)
+        data = convert(getattr(self, attr), CHANNEL_UNITS[attr], unit)
+        return data, quantity, unit
+
+    def read_chunks(self, datachannel: str, chunk_size: int = CHUNK_SIZE):
+        """Reads a channel in chunks. In lazy mode only one chunk at a time is read from the file.
+
+        Args:
+            datachannel (str): channel name, same as for get_channel.
+            chunk_size (int, optional): number of samples per chunk. 
+
+        Yields:
+            tuple: data, quantity, unit
+        """
+        attr, quantity, unit = self._channel_info(datachannel)
+        if self._tdms_file is None:
+            length = len(getattr(self, attr))
+        else:
+            length = len(self._tdms_file[SYNTHESIS_GROUP][CHANNELS[attr]])
+        for offset in range(0, length, chunk_size):
+            data = self._read_channel(attr, offset, min(chunk_size, length - offset))
+            yield convert(data, CHANNEL_UNITS[attr], unit), quantity, unit
             
     #####################################################################################################################
-    def clean_outliers(self, data, window_size, threshold):
-        clean_data = data.copy()
-        half_window = window_size // 2
+    def clean_outliers(self, data, window_size, threshold, method: str = "mean"):
+        """Replaces outliers with the mean (or median) of the window around each sample.
 
-        for i in range(len(data)):
-            start = max(0, i - half_window)
-            end = min(len(data), i + half_window)
-            window = data[start:end]
+        Args:
+            data (array): data to be cleaned.
+            window_size (int): size of the window.
+            threshold (float): limit in number of standard deviations.
+            method (str, optional): "mean" or "median". Defaults to "mean".
 
-            mean_val = np.mean(window)
-            std_val = np.std(window)
-
-            if np.abs(data[i] - mean_val) > threshold * std_val:
-                clean_data[i] = mean_val
+        Returns:
+            array: cleaned data
+        """
+        return clean_outliers(data, window_size, threshold, method)
+    
+    #####################################################################################################################
+    def get_cleaned_channel(self, datachannel: str, window_size: int = 20, threshold: float = 1, method: str = "mean"):
+        """Same as get_channel, but with the outliers removed.
 
-        return clean_data
+        Returns:
+            tuple: data, quantity, unit
+        """
+        data, quantity, unit = self.get_channel(datachannel)
+        return self.clean_outliers(data, window_size, threshold, method), quantity, unit
     
     #####################################################################################################################
     def plot(self, x_channel: str, y_channel: str, **kwargs):
@@ -104,31 +249,26 @@ class AutoClaveSynthesis:
 
         return options.exe()
     #####################################################################################################################
-    def AC_synthesis(self, **kwargs):
-        """_summary_
+    @instrumented("AutoClaveSynthesis.AC_synthesis_table")
+    def AC_synthesis_table(self, **kwargs):
+        """Extracts the synthesis parameters, without making any plot.
 
         Return :
-            dict: extracted values
+            list: rows of [quantity, value, unit]
         """
-        options = {
-            'time_smooth': 0,
-            'pressure_smooth': 0,
-            'pressure_median': 0,
-            "temp_smooth": 10,
-            "temp_median" : 7,
-            "temp_channel": "T_Reactor_in_C",
-            }
+        options = dict(AC_SYNTHESIS_OPTIONS)
         options.update(kwargs)
-        #options=plot_options(kwargs)
         temp_R, temp_q, T_unit = self.get_channel(options["temp_channel"])
-        cleaned_temp_R = self.clean_outliers(temp_R, window_size=20, threshold=1)
+        with stage("AutoClaveSynthesis.clean_outliers"):
+            cleaned_temp_R = self.clean_outliers(temp_R, window_size=20, threshold=1)
 
         window_length = min(51, len(cleaned_temp_R) // 2 * 2 + 1)
         polyorder = min(3, window_length - 1)
-        if window_length > 1:
-            smoothed_temp_R = savgol_filter(cleaned_temp_R, window_length=window_length, polyorder=polyorder)
-        else:
-            smoothed_temp_R = cleaned_temp_R
+        with stage("AutoClaveSynthesis.smoothing"):
+            if window_length > 1:
+                smoothed_temp_R = savgol_filter(cleaned_temp_R, window_length=window_length, polyorder=polyorder)
+            else:
+                smoothed_temp_R = cleaned_temp_R
 
         if len(smoothed_temp_R) == 0 or np.isnan(smoothed_temp_R).all():
             raise ValueError("Smoothed temperature data is empty or contains only NaN values.")
@@ -139,23 +279,73 @@ class AutoClaveSynthesis:
         set_temperature = round(max_temperature_R / 25) * 25
 
         Time,a,time_unit = self.get_channel("Time_in_min")
-        time_set_temp = None
-        for i, temp in enumerate(smoothed_temp_R):
-            if temp >= set_temperature:
-                time_set_temp = Time[i]
-                break
-
-        if time_set_temp is None:
-            time_set_temp = max(Time)
+        with stage("AutoClaveSynthesis.threshold_search"):
+            above_set_temp = smoothed_temp_R >= set_temperature
+            if above_set_temp.any():
+                time_set_temp = Time[np.argmax(above_set_temp)]
+            else:
+                time_set_temp = max(Time)
         ###PRESSURE######
         Overpressure, p_q, p_unit = self.get_channel("P_Reactor_in_bar")
         max_overpressure = round(max(Overpressure), 2)
+        time_max_overpressure = round(Time[Overpressure.argmax()], 2)
         
-        #Time,a,b = self.get_channel("Time_in_min")
         max_time = round(max(Time), 2)
         rotation = int(max(self.Rot))
 
-       
+        tb =  [["Set Temperature", set_temperature, T_unit]]
+        tb.append(['Max Temperature of Reactor',round(max_temperature_R, 2), T_unit])
+        tb.append(['Time to Set Temperature', time_set_temp, time_unit])
+        tb.append(['Heating Rate', round(((set_temperature - smoothed_temp_R[0]) / time_set_temp), 2), T_unit + "/" + time_unit])
+        tb.append(['Max Overpressure', round(max_overpressure,1) , p_unit])
+        tb.append(['Time to Max Overpressure', time_max_overpressure, time_unit] )
+        tb.append(['Pressure Increase Rate', round((max_overpressure - Overpressure[0]) / time_max_overpressure, 2), p_unit + "/"+time_unit])
+        tb.append(["Rotation Rate", rotation, "rpm" ])
+        tb.append(["Duration", max_time, time_unit])
+        return tb
+
+    def get_parameters(self, **kwargs):
+        """Extracts the synthesis parameters, without making any plot.
+
+        Return :
+            dict: extracted values as floats, the key has the format "Quantity [unit]".
+        """
+        return {f"{name} [{unit}]": float(value) for name, value, unit in self.AC_synthesis_table(**kwargs)}
+
+    #####################################################################################################################
+    def AC_synthesis_metrics(self, **kwargs):
+        """Extracts the synthesis parameters as quantities, without making any plot.
+        matplotlib is not imported.
+
+        Return :
+            dict: extracted values as Quantity_Value_Unit, the key is the name of the parameter.
+        """
+        return {name.replace(" ","_"): Q(float(value), unit.replace("/"," /")) for name, value, unit in self.AC_synthesis_table(**kwargs)}
+
+    #####################################################################################################################
+    @instrumented("AutoClaveSynthesis.plot_AC_synthesis")
+    def plot_AC_synthesis(self, table: list = None, **kwargs):
+        """Makes a figure with the temperature and pressure vs time, and a table of the synthesis parameters.
+
+        Args:
+            table (list, optional): rows from AC_synthesis_table. Extracted if not given.
+
+        Return :
+            fig, axs: the figure and the axes.
+        """
+        import matplotlib.pyplot as plt
+
+        options = dict(AC_SYNTHESIS_OPTIONS)
+        options.update(kwargs)
+        if table is None:
+            table = self.AC_synthesis_table(**options)
+        tb = [list(row) for row in table]
+        T_unit = tb[0][2]
+        max_temperature_R = tb[1][1]
+        max_overpressure, p_unit = tb[4][1], tb[4][2]
+        max_time, time_unit = tb[8][1], tb[8][2]
+        tb[0][1] = str(tb[0][1])
+        tb[2][1] = f"{tb[2][1]:3.2e}"
 
         fig, axs = plt.subplots(1, 2, figsize=(12, 6))
         fig.suptitle(self.name, fontsize = 20)
@@ -167,11 +357,6 @@ class AutoClaveSynthesis:
 
         self.plot("Time_in_min", "T_Reactor_in_C", plot = ax_temp, y_smooth=options["temp_smooth"], y_median=options["temp_median"], style="g-")
         self.plot("Time_in_min", "P_Reactor_in_bar", plot = ax_pres,y_smooth=options["pressure_smooth"], y_median=options["pressure_median"], style="b-")
-        #self.plot("Time_in_min", "T_Reactor_in_C", y_smooth=options["temp_smooth"], y_median=options["temp_median"], style="g-")
-
-        
-        #ax_temp.plot(smoothed_time, smoothed_temp, 'g-', label='Temperature [°C]')
-        #ax_pres.plot(smoothed_time, smoothed_pressure, 'b-', label='Overpressure [bar]')
 
         ax_temp.set_ylabel(f'Temperature / {T_unit} ', color='g', fontsize = 13)
         ax_pres.set_ylabel(f'Overpressure / {p_unit}', color='b', fontsize = 13)
@@ -189,46 +374,6 @@ class AutoClaveSynthesis:
 
         axs[1].axis('off')
 
-        # Create table with formatted DataFrame
-        
-        parameters = {
-            "Set Temperature [°C]": set_temperature,
-            'Max Temperature of Reactor [°C]': round(max_temperature_R, 2),
-            'Time to Set Temperature [min]': round(time_set_temp, 2),
-            'Heating Rate [°C/min]': round(((set_temperature - smoothed_temp_R[0]) / time_set_temp), 2),
-            'Max Overpressure [bar]': round(max_overpressure,1),
-            'Time to Max Overpressure [min]': round(self.Time[Overpressure.argmax()], 2),
-            'Pressure Increase Rate [bar/min]': round((max_overpressure - Overpressure[0]) / round(self.Time[Overpressure.argmax()], 2), 2),
-            "Rotation Rate [rpm]": rotation,
-            "Time of Synthesis [min]": max_time
-        }
-        
-        # Create a DataFrame to format the values correctly
-        parameters_df = pd.DataFrame(list(parameters.items()), columns=['Parameter', 'Value'])
-        parameters_df['Value'] = parameters_df['Value'].astype(float)
-
-
-        tb =  [["Set Temperature", str(set_temperature), T_unit]]
-        #f"pos: B={m_pos:3.3e}"
-
-       # tb.append(["Set Temperature", str(f"{set_temperature}"), T_unit])
-        tb.append(['Max Temperature of Reactor',round(max_temperature_R, 2), T_unit])
-        tb.append(['Time to Set Temperature', f"{time_set_temp:3.2e}", time_unit])
-        tb.append(['Heating Rate', round(((set_temperature - smoothed_temp_R[0]) / time_set_temp), 2), T_unit + "/" + time_unit])
-        tb.append(['Max Overpressure', round(max_overpressure,1) , p_unit])
-        tb.append(['Time to Max Overpressure', round(Time[Overpressure.argmax()], 2),time_unit] )
-        tb.append(['Pressure Increase Rate', round((max_overpressure - Overpressure[0]) / round(Time[Overpressure.argmax()], 2), 2), p_unit + "/"+time_unit])
-        tb.append(["Rotation Rate", rotation, "rpm" ])
-        tb.append(["Duration", max_time, time_unit])
-        #tb.append([])
-        #tb.append([])
-        #    {'Heating Rate', round(((set_temperature - smoothed_temp_R[0]) / time_set_temp), 2), T_unit + "/" + time_unit},
-        #    {'Max Overpressure', round(max_overpressure,1),p_unit},
-        #    {'Time to Max Overpressure', round(self.Time[Overpressure.argmax()], 2)},
-        #    { 'Pressure Increase Rate [bar/min]', round((max_overpressure - Overpressure[0]) / round(self.Time[Overpressure.argmax()], 2), 2), p_unit + "/"+time_unit},
-        #    { "Rotation Rate", rotation, "rpm"  },
-        #    {"Time of Synthesis ", max_time, time_unit}
-        #}
         columns = ('Quantity', 'Value', 'Unit')
         col_width = [0.7,0.2,0.2]
 
@@ -237,26 +382,46 @@ class AutoClaveSynthesis:
         #for i in tb:
         #    print(len(i))
         #table = axs[1].table(cellText=parameters_df.values, colLabels=parameters_df.columns, cellLoc='center', loc='center', edges='horizontal')
-        table = axs[1].table(cellText=tb, 
-                             colLabels=columns,
-                             colWidths=col_width, 
-                             cellLoc='center', 
-                             loc='center', 
-                             edges='horizontal')
-
-        table.auto_set_font_size(False)
-        table.set_fontsize(10)
-        table.scale(1, 2)
-
-        # Make column names bold
-        for (i, j), cell in table.get_celld().items():
-            if i == 0:
-                cell.set_text_props(weight="bold")
-            if i > 0 and j==0:
-                 cell.set_text_props(ha="left")
-
-        plt.tight_layout(rect=[0, 0, 1, 0.95])
+        with stage("AutoClaveSynthesis.render_table"):
+            table = axs[1].table(cellText=tb, 
+                                 colLabels=columns,
+                                 colWidths=col_width, 
+                                 cellLoc='center', 
+                                 loc='center', 
+                                 edges='horizontal')
+
+            table.auto_set_font_size(False)
+            table.set_fontsize(10)
+            table.scale(1, 2)
+
+            # Make column names bold
+            for (i, j), cell in table.get_celld().items():
+                if i == 0:
+                    cell.set_text_props(weight="bold")
+                if i > 0 and j==0:
+                     cell.set_text_props(ha="left")
+
+            plt.tight_layout(rect=[0, 0, 1, 0.95])
+        return fig, axs
+
+    #####################################################################################################################
+    @instrumented("AutoClaveSynthesis.AC_synthesis")
+    def AC_synthesis(self, **kwargs):
+        """Extracts the synthesis parameters and shows them in a figure.
+        Use AC_synthesis_metrics to only extract the values.
+
+        Return :
+            dict: extracted values
+        """
+        import matplotlib.pyplot as plt
+
+        options = dict(AC_SYNTHESIS_OPTIONS)
+        options.update(kwargs)
+        tb = self.AC_synthesis_table(**options)
+        self.plot_AC_synthesis(tb, **options)
         plt.show()
+        tb[0][1] = str(tb[0][1])
+        tb[2][1] = f"{tb[2][1]:3.2e}"
         
         out = dict()
         for row in tb:
@@ -265,4 +430,3 @@ class AutoClaveSynthesis:
             value =str(row[1]) +str(" ")+ str(row[2])
             out[key] = value
         return out
-        
\ No newline at end of file
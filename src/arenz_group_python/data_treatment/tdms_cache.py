@@ -0,0 +1,138 @@
+"""
+Cache of channels extracted from TDMS files.
+
+Each cached file is stored as a folder with one .npy file per channel, so that the channels can be memory mapped
+when they are loaded again. An entry is keyed by the path, the size and the modification time of the source file,
+i.e. the entry is not used any more as soon as the source file is changed.
+"""
+
+from pathlib import Path
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from ..project.util_paths import Project_Paths
+
+DEFAULT_MAX_SIZE = 2**30
+"""Default size limit of the cache in bytes."""
+
+META_FILE = "meta.json"
+
+
+class TdmsChannelCache:
+    """Cache of channels extracted from TDMS files, stored as .npy files.
+
+    - cache.load(path) returns the cached channels and properties, or None if the file is not in the cache.
+
+    - cache.store(path, channels, properties) adds a file to the cache.
+
+    The least recently used entries are removed when the size of the cache exceeds max_size.
+    """
+
+    def __init__(self, cache_dir: Path = None, max_size: int = DEFAULT_MAX_SIZE):
+        """
+        Args:
+            cache_dir (Path, optional): cache folder. Defaults to the "tdms" folder in the project cache folder.
+            max_size (int, optional): size limit of the cache in bytes.
+        """
+        if cache_dir is None:
+            cache_dir = Project_Paths().cache_path / "tdms"
+        self.cache_dir = Path(cache_dir)
+        self.max_size = max_size
+
+    #####################################################################################################################
+    @staticmethod
+    def _path_id(path: Path) -> str:
+        return hashlib.sha1(str(Path(path).resolve()).encode()).hexdigest()[:16]
+
+    def key(self, path: Path) -> str:
+        """Returns the key of the current version of the file."""
+        stat = os.stat(path)
+        version = hashlib.sha1(f"{stat.st_size}_{stat.st_mtime_ns}".encode()).hexdigest()[:16]
+        return f"{self._path_id(path)}_{version}"
+
+    def _entries(self, path_id: str = "*"):
+        if not self.cache_dir.exists():
+            return []
+        return [p for p in self.cache_dir.glob(f"{path_id}_*") if p.is_dir()]
+
+    #####################################################################################################################
+    def load(self, path: Path, mmap: bool = True):
+        """Loads the channels of a file from the cache.
+
+        Args:
+            path (Path): path to the source TDMS file.
+            mmap (bool, optional): memory map the channels. Defaults to True.
+
+        Returns:
+            tuple | None: (channels, properties) as dicts, or None if the file is not in the cache.
+        """
+        entry = self.cache_dir / self.key(path)
+        meta_file = entry / META_FILE
+        mmap_mode = "r" if mmap else None
+        try:
+            with open(meta_file, "r") as f:
+                meta = json.load(f)
+            channels = {name: np.load(entry / f"{name}.npy", mmap_mode=mmap_mode) for name in meta["channels"]}
+        except FileNotFoundError:
+            # not in the cache, or removed by another process while it was loaded.
+            return None
+        try:
+            os.utime(meta_file)  # mark as recently used
+        except OSError:
+            pass  # ex: a read-only cache
+        return channels, meta["properties"]
+
+    def store(self, path: Path, channels: dict, properties: dict):
+        """Adds the channels of a file to the cache. Older versions of the same file are removed.
+
+        Args:
+            path (Path): path to the source TDMS file.
+            channels (dict): name and data of each channel.
+            properties (dict): json serializable properties.
+        """
+        key = self.key(path)
+        for old_entry in self._entries(self._path_id(path)):
+            if old_entry.name != key:
+                shutil.rmtree(old_entry, ignore_errors=True)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_dir = Path(tempfile.mkdtemp(dir=self.cache_dir, prefix=".tmp_"))
+        try:
+            for name, data in channels.items():
+                np.save(tmp_dir / f"{name}.npy", np.asarray(data))
+            meta = {"source": str(Path(path).resolve()), "channels": list(channels), "properties": properties}
+            with open(tmp_dir / META_FILE, "w") as f:
+                json.dump(meta, f)
+            os.replace(tmp_dir, self.cache_dir / key)
+        except OSError:
+            # another process stored the same entry.
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        self._evict()
+
+    #####################################################################################################################
+    def size(self) -> int:
+        """Size of the cache in bytes."""
+        return sum(f.stat().st_size for entry in self._entries() for f in entry.iterdir())
+
+    def _evict(self):
+        entries = []
+        for entry in self._entries():
+            try:
+                entries.append((os.stat(entry / META_FILE).st_mtime, sum(f.stat().st_size for f in entry.iterdir()), entry))
+            except FileNotFoundError:
+                pass
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries, key=lambda x: x[0]):
+            if total <= self.max_size:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        """Removes all entries from the cache."""
+        for entry in self._entries():
+            shutil.rmtree(entry, ignore_errors=True)
@@ -0,0 +1,154 @@
+"""
+Unit registry with SI prefixes and dimension analysis.
+
+Each unit is described by a factor to SI base units and its dimension, ex: "bar" = 1e5 kg m^-1 s^-2.
+Symbols that are not in the registry are treated as a base dimension of their own, i.e. they can only be
+converted to themselves.
+
+The conversion factor between two units is computed once and cached.
+"""
+
+from functools import lru_cache
+
+from .util import symbols, parse_unit
+
+BASE_DIMENSIONS = ("m", "kg", "s", "A", "K", "mol", "cd")
+
+UNITS = {
+    # symbol: (factor to SI, dimension, prefixable)
+    "m":   (1.0,      {"m": 1},                             True),
+    "g":   (1.0e-3,   {"kg": 1},                            True),
+    "s":   (1.0,      {"s": 1},                             True),
+    "A":   (1.0,      {"A": 1},                             True),
+    "K":   (1.0,      {"K": 1},                             True),
+    "mol": (1.0,      {"mol": 1},                           True),
+    "cd":  (1.0,      {"cd": 1},                            True),
+    "min": (60.0,     {"s": 1},                             False),
+    "h":   (3600.0,   {"s": 1},                             False),
+    "Hz":  (1.0,      {"s": -1},                            True),
+    "rpm": (1.0/60.0, {"s": -1},                            False),
+    "N":   (1.0,      {"kg": 1, "m": 1, "s": -2},           True),
+    "Pa":  (1.0,      {"kg": 1, "m": -1, "s": -2},          True),
+    "bar": (1.0e5,    {"kg": 1, "m": -1, "s": -2},          True),
+    "atm": (101325.0, {"kg": 1, "m": -1, "s": -2},          False),
+    "J":   (1.0,      {"kg": 1, "m": 2, "s": -2},           True),
+    "eV":  (1.602176634e-19, {"kg": 1, "m": 2, "s": -2},    True),
+    "W":   (1.0,      {"kg": 1, "m": 2, "s": -3},           True),
+    "C":   (1.0,      {"A": 1, "s": 1},                     True),
+    "V":   (1.0,      {"kg": 1, "m": 2, "s": -3, "A": -1},  True),
+    "F":   (1.0,      {"kg": -1, "m": -2, "s": 4, "A": 2},  True),
+    "Ω":   (1.0,      {"kg": 1, "m": 2, "s": -3, "A": -2},  True),
+    "ohm": (1.0,      {"kg": 1, "m": 2, "s": -3, "A": -2},  True),
+    "S":   (1.0,      {"kg": -1, "m": -2, "s": 3, "A": 2},  True),
+    "L":   (1.0e-3,   {"m": 3},                             True),
+    "M":   (1.0e3,    {"mol": 1, "m": -3},                  True),
+    "°C":  (1.0,      {"K": 1},                             False),
+}
+
+OFFSETS = {
+    "°C": 273.15,
+}
+"""Offset to the SI unit, only used when the unit is the symbol alone, ex: "°C" but not "°C /min"."""
+
+PREFIXES = {
+    "Y": 1e24, "Z": 1e21, "E": 1e18, "P": 1e15, "T": 1e12, "G": 1e9, "M": 1e6, "k": 1e3, "h": 1e2, "da": 1e1,
+    "d": 1e-1, "c": 1e-2, "m": 1e-3, "µ": 1e-6, "u": 1e-6, "n": 1e-9, "p": 1e-12, "f": 1e-15, "a": 1e-18,
+    "z": 1e-21, "y": 1e-24,
+}
+
+
+@lru_cache(maxsize=1024)
+def _symbol_info(symbol: str):
+    """Returns the factor to SI and the dimension of a single symbol, ex: "mV"."""
+    if symbol in UNITS:
+        factor, dim, _ = UNITS[symbol]
+        return factor, dim
+    for length in (2, 1):
+        prefix, base = symbol[:length], symbol[length:]
+        if prefix in PREFIXES and base in UNITS and UNITS[base][2]:
+            factor, dim, _ = UNITS[base]
+            return PREFIXES[prefix] * factor, dim
+    return 1.0, {symbol: 1}
+
+
+@lru_cache(maxsize=1024)
+def unit_info(unit: symbols):
+    """Returns the factor to SI, the dimension and the offset to SI of a unit.
+
+    Args:
+        unit (symbols): the unit.
+
+    Returns:
+        factor (float):
+        dimension (tuple): sorted pairs of (base dimension, exponent).
+        offset (float):
+    """
+    factor = 1.0
+    dims = {}
+    for symbol, exponent in unit._items:
+        f, dim = _symbol_info(symbol)
+        factor *= f ** exponent
+        for base, e in dim.items():
+            dims[base] = dims.get(base, 0.0) + e * exponent
+    offset = 0.0
+    if len(unit._items) == 1 and unit._items[0][1] == 1:
+        offset = OFFSETS.get(unit._items[0][0], 0.0)
+    dimension = tuple(sorted((base, e) for base, e in dims.items() if e != 0))
+    return factor, dimension, offset
+
+
+def _to_symbols(unit) -> symbols:
+    if isinstance(unit, symbols):
+        return unit
+    unit = str(unit).strip()
+    return parse_unit(unit) if unit else symbols()
+
+
+def is_compatible(from_unit, to_unit) -> bool:
+    """True if the units have the same dimension."""
+    return unit_info(_to_symbols(from_unit))[1] == unit_info(_to_symbols(to_unit))[1]
+
+
+@lru_cache(maxsize=1024)
+def _conversion(from_unit: symbols, to_unit: symbols):
+    f1, dim1, o1 = unit_info(from_unit)
+    f2, dim2, o2 = unit_info(to_unit)
+    if dim1 != dim2:
+        raise ValueError(f"The unit '{from_unit}' can not be converted to '{to_unit}'")
+    return f1 / f2, (o1 - o2) / f2
+
+
+def conversion_factor(from_unit, to_unit, offset: bool = True):
+    """The factor and offset to convert values, i.e. new_value = factor * value + offset.
+
+    Args:
+        from_unit (str | symbols): current unit.
+        to_unit (str | symbols): new unit.
+        offset (bool, optional): use the offset of units like "°C". Use False to convert differences. Defaults to True.
+
+    Raises:
+        ValueError: if the units do not have the same dimension.
+
+    Returns:
+        factor (float):
+        offset (float):
+    """
+    factor, off = _conversion(_to_symbols(from_unit), _to_symbols(to_unit))
+    return factor, (off if offset else 0.0)
+
+
+def convert(values, from_unit, to_unit, offset: bool = True):
+    """Converts values, a number or an array, from one unit to another.
+
+    Ex:
+        convert(data, "K", "°C")
+
+    Raises:
+        ValueError: if the units do not have the same dimension.
+    """
+    factor, off = conversion_factor(from_unit, to_unit, offset)
+    if factor == 1.0 and off == 0.0:
+        return values
+    if off == 0.0:
+        return values * factor
+    return values * factor + off
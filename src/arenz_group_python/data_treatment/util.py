@@ -4,6 +4,9 @@ Utility module.
 """
 
 import math
+import weakref
+from functools import lru_cache
+import numpy as np
 #from scipy.signal import savgol_filter, medfilt
 #from scipy import ndimage, datasets
 #import matplotlib.pyplot as plt
@@ -50,68 +53,141 @@ class symbol_string:
 """
 
 class symbols:
-    def __init__(self,s:str=None):
-        self._sym = {}
+    """Unit (or quantity) signature, i.e. symbols and their exponents, ex: "m^2 s^-1".
+
+    The signatures are immutable and interned, i.e. there is only one instance per signature in use.
+    The intern table holds weak references, i.e. a signature that is no longer used is removed from it.
+    Equality, hashing, multiplication and division are therefore tuple operations, 
+    and a string is only parsed when a new signature is created from a string.
+    """
+    __slots__ = ("_items", "_key", "_hash", "_str", "__weakref__")
+    _interned = weakref.WeakValueDictionary()
+    _add_cache = {}
+    _mul_cache = {}
+    _CACHE_SIZE = 4096
+
+    def __new__(cls, s:str=None):
         if s:
-            list_of_quantities = (s.strip()).split(" ", 100)
-            if len(list_of_quantities)>0:
-                k={}
-                for single_quantity in list_of_quantities:
-                    nyckel, exponent = get_unit_and_exponent(single_quantity)
-                    val = float(k.get(nyckel, 0))  
-                    k[nyckel] = val + exponent
-                self._sym = k.copy()
-        #print(k)
-        
+            return parse_unit(s)
+        return cls._from_items(())
+
+    @classmethod
+    def _from_items(cls, items: tuple):
+        """Returns the interned signature of (symbol, exponent) pairs. Empty symbols and zero exponents are removed."""
+        r = cls._interned.get(items)
+        if r is None:
+            canonical = tuple((key, float(value)) for key, value in items if key != "" and value != 0)
+            r = cls._interned.get(canonical)
+            if r is None:
+                r = object.__new__(cls)
+                r._items = canonical
+                r._key = tuple(sorted((key, value) for key, value in canonical if int(value*10) != 0))
+                r._hash = hash(r._key)
+                r._str = _symbols_to_str(canonical)
+                cls._interned[canonical] = r
+            cls._interned[items] = r
+        return r
+
+    def __reduce__(self):
+        return (symbols._from_items, (self._items,))
+
+    @property
+    def _sym(self) -> dict:
+        return dict(self._items)
+
     def __str__(self) -> str:
-        sr =""
-        for key, value in self._sym.items():
-            if  int(value*10) == 0:
-                pass
-            elif int(value*10) == 10:
-                sr = sr +f' {key}'
-            elif int(value) == value:
-                sr = sr+ f' {key}^{value:.0f}'
-            else:
-                sr = sr+ f' {key}^{value:.1f}'
-        return sr.strip()
+        return self._str
+
+    def __repr__(self) -> str:
+        return f"symbols('{self._str}')"
+
+    def __hash__(self) -> int:
+        return self._hash
     
     def __add__(self, other):
-        #s = quantity_fix(self.symbols + other.symbols)             
         if isinstance(other,symbols):
-            k=symbols()
-            k=self._sym.copy()
-            for quantity,exponent in other._sym.items():
-                #print("aadd: ",quantity,quantity != "") 
-                if quantity != "":
-                    val = float(self._sym.get(quantity, 0))
-                    k[quantity] = val + exponent
-            r = symbols()
-            r._sym = k.copy()
+            cache_key = (self._items, other._items)
+            r = symbols._add_cache.get(cache_key)
+            if r is None:
+                k = dict(self._items)
+                for quantity,exponent in other._items:
+                    k[quantity] = k.get(quantity, 0.0) + exponent
+                r = symbols._from_items(tuple(k.items()))
+                if len(symbols._add_cache) > symbols._CACHE_SIZE:
+                    symbols._add_cache.clear()
+                symbols._add_cache[cache_key] = r
             return r
         else:
             raise TypeError("must be of the same type") 
     
     def __sub__(self,other):
-        k=symbols()
-        k = other*-1
-        return (self+k)
+        return (self + other*-1)
     
     def __mul__(self, other):
         if isinstance(other,int) or isinstance(other,float):
-            r=symbols()
-            k=self._sym.copy()
-            for quantity,exponent in self._sym.items():
-                #print("q",quantity,quantity != "") 
-                if quantity != "":
-                    k[quantity] = exponent * other
-            r._sym = k.copy()
+            cache_key = (self._items, other)
+            r = symbols._mul_cache.get(cache_key)
+            if r is None:
+                r = symbols._from_items(tuple((quantity, exponent * other) for quantity, exponent in self._items))
+                if len(symbols._mul_cache) > symbols._CACHE_SIZE:
+                    symbols._mul_cache.clear()
+                symbols._mul_cache[cache_key] = r
             return r
         else:
             raise TypeError("must be a float or an int")
+
     def __eq__(self, other: object) -> bool:
+        if self is other:
+            return True
+        if isinstance(other, symbols):
+            return self._key == other._key
         return str(self) == str(other)
 
+
+def _convert_to_unit(values, from_unit, to_unit):
+    """Converts the values of a sum or difference. Raises ValueError if the units are not compatible."""
+    from .units import convert
+    try:
+        return convert(values, from_unit, to_unit, offset=False)
+    except ValueError:
+        raise ValueError("Must have the same unit")
+
+
+UNIT_CACHE_SIZE = 1024
+
+@lru_cache(maxsize=UNIT_CACHE_SIZE)
+def parse_unit(s:str) -> symbols:
+    """Parses a unit string, ex: "m^2 s^-1" or "mV /s", into a signature.
+    The result is cached, use parse_unit.cache_info() to get the number of hits and misses.
+
+    Args:
+        s (str): unit string
+
+    Returns:
+        symbols: the unit signature
+    """
+    k={}
+    list_of_quantities = (s.strip()).split(" ", 100)
+    for single_quantity in list_of_quantities:
+        nyckel, exponent = get_unit_and_exponent(single_quantity)
+        val = float(k.get(nyckel, 0))  
+        k[nyckel] = val + exponent
+    return symbols._from_items(tuple(k.items()))
+
+
+def _symbols_to_str(items) -> str:
+    sr =""
+    for key, value in items:
+        if  int(value*10) == 0:
+            pass
+        elif int(value*10) == 10:
+            sr = sr +f' {key}'
+        elif int(value) == value:
+            sr = sr+ f' {key}^{value:.0f}'
+        else:
+            sr = sr+ f' {key}^{value:.1f}'
+    return sr.strip()
+
 ########################################################################################
 class Quantity_Value_Unit:
     """A class for quantity calculation.
@@ -124,16 +200,10 @@ class Quantity_Value_Unit:
             q = ""
         else:
             v = value
-            if isinstance(unit, symbols):
-                u = str(unit).strip()
-            else:
-                u=unit.strip()
-            if isinstance(unit, symbols):
-                q = str(quantity)
-            else:
-                q=quantity
-        self._unit =symbols(u)
-        self._quantity =symbols(q)
+            u = unit if isinstance(unit, symbols) else unit.strip()
+            q = quantity
+        self._unit = u if isinstance(u, symbols) else symbols(u)
+        self._quantity = q if isinstance(q, symbols) else symbols(q)
         self.value = float(v)
         
     def __str__(self) -> str:
@@ -143,28 +213,34 @@ class Quantity_Value_Unit:
         return self.value
     
     def __add__(self, other: object):
+        if isinstance(other, QuantityArray):
+            return NotImplemented
         v = Quantity_Value_Unit()
         if isinstance(other,Quantity_Value_Unit):
-            if self.unit == other.unit:       
-                return Quantity_Value_Unit(self.value+other.value,str(self._unit), str(self._quantity))
+            if self._unit == other._unit:       
+                return Quantity_Value_Unit(self.value+other.value,self._unit, self._quantity)
             else:
-                raise ValueError("Must have the same unit")
+                return Quantity_Value_Unit(self.value+_convert_to_unit(other.value, other._unit, self._unit),self._unit, self._quantity)
         else:
             raise TypeError("Must be of the same type")
         return v
     
     def __sub__(self, other: object):
+        if isinstance(other, QuantityArray):
+            return NotImplemented
         v = Quantity_Value_Unit()
         if isinstance(other,Quantity_Value_Unit):
-            if self.unit == other.unit:       
-                return Quantity_Value_Unit(self.value-other.value,str(self._unit), str(self._quantity))
+            if self._unit == other._unit:       
+                return Quantity_Value_Unit(self.value-other.value,self._unit, self._quantity)
             else:
-                raise ValueError("Must have the same unit")
+                return Quantity_Value_Unit(self.value-_convert_to_unit(other.value, other._unit, self._unit),self._unit, self._quantity)
         else:
             raise TypeError("Must be of the same type")
         return v
     
     def __mul__(self, other):
+        if isinstance(other, QuantityArray):
+            return NotImplemented
         if isinstance(other, Quantity_Value_Unit):
             v= Quantity_Value_Unit(self.value * other.value, (self._unit + other._unit), self._quantity + other._quantity)
         else:
@@ -179,6 +255,8 @@ class Quantity_Value_Unit:
         return v
     
     def __truediv__(self, other: object):
+        if isinstance(other, QuantityArray):
+            return NotImplemented
         
         if isinstance(other, Quantity_Value_Unit):
             v = Quantity_Value_Unit(self.value / other.value, self._unit - other._unit, self._quantity - other._quantity)
@@ -193,6 +271,140 @@ class Quantity_Value_Unit:
             raise TypeError("Must be a number, i.e. float or int")
             return
         
+    def to(self, unit):
+        """Converts the value to another unit, ex: Q("1500 mV").to("V")
+
+        Raises:
+            ValueError: if the units do not have the same dimension.
+        """
+        from .units import convert
+        unit = unit if isinstance(unit, symbols) else symbols(str(unit).strip())
+        return Quantity_Value_Unit(convert(self.value, self._unit, unit), unit, self._quantity)
+
+    @property
+    def unit(self):
+        return str(self._unit)
+    
+    @property
+    def quantity(self):
+        return str(self._quantity)
+
+########################################################################################
+class QuantityArray:
+    """An array of values sharing the same unit and quantity.
+    
+    The arithmetic is vectorized, and uses the same unit rules as Quantity_Value_Unit.
+    """
+    def __init__(self, values=(), unit="", quantity=""):
+        self.values = np.asarray(values, dtype=float)
+        self._unit = unit if isinstance(unit, symbols) else symbols(str(unit).strip())
+        self._quantity = quantity if isinstance(quantity, symbols) else symbols(str(quantity))
+
+    @classmethod
+    def from_quantities(cls, quantities):
+        """Creates an array from a list of Quantity_Value_Unit. All must have the same unit.
+
+        Args:
+            quantities (list[Quantity_Value_Unit]): quantities.
+
+        Returns:
+            QuantityArray: 
+        """
+        quantities = list(quantities)
+        if len(quantities) == 0:
+            return cls()
+        first = quantities[0]
+        for q in quantities:
+            if not isinstance(q, Quantity_Value_Unit):
+                raise TypeError("Must be of the same type")
+            if q._unit != first._unit:
+                raise ValueError("Must have the same unit")
+        return cls([q.value for q in quantities], first._unit, first._quantity)
+
+    def to_quantities(self):
+        """Returns:
+            list[Quantity_Value_Unit]: one quantity per value.
+        """
+        return [Quantity_Value_Unit(float(v), self._unit, self._quantity) for v in self.values]
+
+    def __str__(self) -> str:
+        return f'{self.values} {self._unit}'
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __iter__(self):
+        return iter(self.to_quantities())
+
+    def __getitem__(self, index):
+        v = self.values[index]
+        if np.ndim(v) == 0:
+            return Quantity_Value_Unit(float(v), self._unit, self._quantity)
+        return QuantityArray(v, self._unit, self._quantity)
+
+    def _same_unit_values(self, other):
+        if isinstance(other, (QuantityArray, Quantity_Value_Unit)):
+            values = other.values if isinstance(other, QuantityArray) else other.value
+            if self._unit == other._unit:
+                return values
+            else:
+                return _convert_to_unit(values, other._unit, self._unit)
+        else:
+            raise TypeError("Must be of the same type")
+
+    def __add__(self, other):
+        return QuantityArray(self.values + self._same_unit_values(other), self._unit, self._quantity)
+
+    def __radd__(self, other):
+        return self.__add__(other)
+
+    def __sub__(self, other):
+        return QuantityArray(self.values - self._same_unit_values(other), self._unit, self._quantity)
+
+    def __rsub__(self, other):
+        return QuantityArray(self._same_unit_values(other) - self.values, self._unit, self._quantity)
+
+    def __mul__(self, other):
+        if isinstance(other, QuantityArray):
+            return QuantityArray(self.values * other.values, self._unit + other._unit, self._quantity + other._quantity)
+        elif isinstance(other, Quantity_Value_Unit):
+            return QuantityArray(self.values * other.value, self._unit + other._unit, self._quantity + other._quantity)
+        else:
+            return QuantityArray(self.values * np.asarray(other, dtype=float), self._unit, self._quantity)
+
+    def __rmul__(self, other):
+        return self.__mul__(other)
+
+    def __truediv__(self, other):
+        if isinstance(other, QuantityArray):
+            return QuantityArray(self.values / other.values, self._unit - other._unit, self._quantity - other._quantity)
+        elif isinstance(other, Quantity_Value_Unit):
+            return QuantityArray(self.values / other.value, self._unit - other._unit, self._quantity - other._quantity)
+        else:
+            return QuantityArray(self.values / np.asarray(other, dtype=float), self._unit, self._quantity)
+
+    def __rtruediv__(self, other):
+        if isinstance(other, Quantity_Value_Unit):
+            return QuantityArray(other.value / self.values, other._unit - self._unit, other._quantity - self._quantity)
+        else:
+            return QuantityArray(np.asarray(other, dtype=float) / self.values, self._unit * -1, self._quantity * -1)
+
+    def to(self, unit):
+        """Converts the values to another unit, ex: "mV".
+
+        Raises:
+            ValueError: if the units do not have the same dimension.
+        """
+        from .units import convert
+        unit = unit if isinstance(unit, symbols) else symbols(str(unit).strip())
+        return QuantityArray(convert(self.values, self._unit, unit), unit, self._quantity)
+
+    def __pow__(self, other:int|float):
+        if isinstance(other, float) or isinstance(other, int):
+            return QuantityArray(self.values ** float(other), self._unit*other, self._quantity*other)
+        else:
+            raise TypeError("Must be a number, i.e. float or int")
+
     @property
     def unit(self):
         return str(self._unit)
@@ -0,0 +1,109 @@
+"""
+Utility module for filtering of data channels.
+
+The rolling windows used here are the same as in the original per sample loop,
+i.e. for sample i the window is data[i - window_size//2 : i + window_size//2],
+truncated at the start and the end of the data.
+"""
+
+import numpy as np
+
+MAD_TO_STD = 1.4826
+"""Scale factor between the median absolute deviation and the standard deviation of normal distributed data."""
+
+CHUNK_SIZE = 65536
+
+
+def _window_bounds(length: int, window_size: int):
+    """Returns the start and end index of the rolling window of each sample."""
+    half_window = int(window_size) // 2
+    index = np.arange(length)
+    start = np.maximum(0, index - half_window)
+    end = np.minimum(length, index + half_window)
+    return start, end
+
+
+def rolling_mean_std(data, window_size: int):
+    """Rolling mean and standard deviation in O(n) using cumulative sums.
+
+    Args:
+        data (array): data to be analysed.
+        window_size (int): size of the window.
+
+    Returns:
+        mean (array): the mean of the window around each sample. NaN if the window is empty.
+        std (array): the standard deviation (ddof=0) of the window around each sample. NaN if the window is empty.
+    """
+    data = np.asarray(data, dtype=float)
+    length = len(data)
+    start, end = _window_bounds(length, window_size)
+    count = end - start
+    # shift the data to reduce the round-off error of the cumulative sums.
+    offset = data.mean() if length > 0 else 0.0
+    shifted = data - offset
+    cum = np.concatenate(([0.0], np.cumsum(shifted)))
+    cum_sq = np.concatenate(([0.0], np.cumsum(shifted * shifted)))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = (cum[end] - cum[start]) / count
+        var = (cum_sq[end] - cum_sq[start]) / count - mean * mean
+    std = np.sqrt(np.clip(var, 0.0, None))
+    return mean + offset, std
+
+
+def rolling_median_mad(data, window_size: int):
+    """Rolling median and median absolute deviation.
+
+    The windows are evaluated as strided views, in blocks of CHUNK_SIZE samples to limit the memory usage.
+
+    Args:
+        data (array): data to be analysed.
+        window_size (int): size of the window.
+
+    Returns:
+        median (array): the median of the window around each sample. NaN if the window is empty.
+        mad (array): the median absolute deviation of the window around each sample. NaN if the window is empty.
+    """
+    data = np.asarray(data, dtype=float)
+    length = len(data)
+    half_window = int(window_size) // 2
+    median = np.full(length, np.nan)
+    mad = np.full(length, np.nan)
+    if half_window == 0 or length == 0:
+        return median, mad
+    padded = np.concatenate((np.full(half_window, np.nan), data, np.full(half_window, np.nan)))
+    windows = np.lib.stride_tricks.sliding_window_view(padded, 2 * half_window)
+    for first in range(0, length, CHUNK_SIZE):
+        last = min(length, first + CHUNK_SIZE)
+        block = windows[first:last]
+        med = np.nanmedian(block, axis=1)
+        median[first:last] = med
+        mad[first:last] = np.nanmedian(np.abs(block - med[:, None]), axis=1)
+    return median, mad
+
+
+def clean_outliers(data, window_size: int, threshold: float, method: str = "mean"):
+    """Replaces outliers with the rolling mean (or median) of the surrounding window.
+
+    Args:
+        data (array): data to be cleaned.
+        window_size (int): size of the window.
+        threshold (float): a sample is an outlier if it deviates more than threshold * std from the window mean.
+        method (str, optional): "mean" for mean and standard deviation,
+            "median" for median and scaled median absolute deviation. Defaults to "mean".
+
+    Returns:
+        array: cleaned copy of the data.
+    """
+    match method:
+        case "mean":
+            center, spread = rolling_mean_std(data, window_size)
+        case "median":
+            center, spread = rolling_median_mad(data, window_size)
+            spread = spread * MAD_TO_STD
+        case _:
+            raise ValueError(f"The method '{method}' is not supported. Use 'mean' or 'median'.")
+    clean_data = np.array(data, copy=True)
+    with np.errstate(invalid="ignore"):
+        outliers = np.abs(np.asarray(data, dtype=float) - center) > threshold * spread
+    clean_data[outliers] = center[outliers]
+    return clean_data
@@ -6,7 +6,7 @@ Utility module.
 #import math
 from scipy.signal import savgol_filter, medfilt
 #from scipy import ndimage, datasets
-import matplotlib.pyplot as plt
+#matplotlib is imported when a figure is made, so the data treatment can be used without it.
 #from fractions import Fraction
 #import matplotlib.pyplot as plt
 
@@ -16,6 +16,7 @@ NEWPLOT = "new_plot"
 
 
 def make_plot_1x(Title:str):
+    import matplotlib.pyplot as plt
     fig = plt.figure()
     fig.set_figheight(5)
     fig.set_figwidth(6)
@@ -23,6 +24,7 @@ def make_plot_1x(Title:str):
     return fig.subplots()
 
 def make_plot_2x(Title:str):
+        import matplotlib.pyplot as plt
         fig = plt.figure()
         fig.set_figheight(5)
         fig.set_figwidth(13)
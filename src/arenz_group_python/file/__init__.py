@@ -6,9 +6,32 @@ Module for creating projects\n
 
 
 
-from .file_dict import save_dict_to_file, load_dict_from_file, save_dict_to_tableFile
+# The names are imported when they are used for the first time, see _lazy.py.
+from .._lazy import lazy_getattr
 
-__all__ = ["save_dict_to_file","load_dict_from_file", "save_dict_to_tableFile"]
+_LAZY_NAMES = {
+    "save_dict_to_file": ".file_dict",
+    "load_dict_from_file": ".file_dict",
+    "load_dicts_from_files": ".file_dict",
+    "save_dict_to_tableFile": ".file_dict",
+    "compact_tableFile": ".file_dict",
+    "TableStore": ".table_store",
+    "file_lock": ".file_lock",
+    "atomic_write": ".file_lock",
+    "save_dict_to_parquetFile": ".parquet_store",
+    "save_dicts_to_parquetFile": ".parquet_store",
+    "load_parquetFile": ".parquet_store",
+    "save_key_values": ".key_values_to_file",
+    "save_key_values_many": ".key_values_to_file",
+    "load_key_values": ".key_values_to_file",
+    "compact_key_values": ".key_values_to_file",
+}
+
+__getattr__, __dir__ = lazy_getattr(globals(), _LAZY_NAMES)
+
+__all__ = ["save_dict_to_file","load_dict_from_file", "load_dicts_from_files", "save_dict_to_tableFile", "compact_tableFile", "TableStore", "file_lock", "atomic_write",
+           "save_dict_to_parquetFile", "save_dicts_to_parquetFile", "load_parquetFile",
+           "save_key_values", "save_key_values_many", "load_key_values", "compact_key_values"]
 
 
 #Import the submodules
@@ -1,23 +1,41 @@
 from pathlib import Path
-from ..data_treatment.util import Quantity_Value_Unit as Q
+from ..data_treatment.util import Quantity_Value_Unit as Q, parse_unit
+from concurrent.futures import ThreadPoolExecutor
+import glob
+import json
+import numbers
+import os
+import re
+import numpy as np
 import pandas as pd
-import warnings
+
+from ..instrumentation import instrumented
+from .table_store import TableStore, UNIQUE_KEY, journal_upsert, journal_path, shard_path, shard_paths
 
 
 DELIMITER = '\t'
 
+TYPED_SUFFIX = ".json"
+"""Suffix of the typed sidecar of a dict file, ex: "parameters.txt.json"."""
+
 
-def save_dict_to_file(file_path:Path, kw: dict):
+@instrumented("save_dict_to_file")
+def save_dict_to_file(file_path:Path, kw: dict, typed:bool=False):
     """Saves a dict to text file
 
     Args:
         file_path (Path): _description_
         kw (dict): _description_
+        typed (bool, optional): also save a typed sidecar, "<file>.json", which load_dict_from_file reads 
+            instead of parsing the text. Defaults to False.
     """
     with open(file_path, 'w') as file:
         for k,v in kw.items():
             file.writelines(f"{k} = {v}\n")    
-        file.close
+    if typed:
+        # written after the text file, so that its modification time is not older.
+        with open(typed_path(file_path), 'w', encoding="utf-8") as file:
+            json.dump({str(k): _to_typed(v) for k, v in kw.items()}, file, ensure_ascii=False)
     return 
 
 def load_dict_from_file(file_path:Path):
@@ -28,104 +46,286 @@ def load_dict_from_file(file_path:Path):
         my_quantity = 10.5 nm\n
         my_text = "a string" 
 
+    If the file has an up to date typed sidecar, see save_dict_to_file, the values are read from it instead.
+
     Args:
         file_path (Path): to dict.
 
     Returns:
         dict: the dict from the file
     """
-    k={}
+    typed = _load_typed_dict(file_path)
+    if typed is not None:
+        return typed
     with open(file_path, 'r') as file:
-        aa= True
-        while(aa):
-            a=  file.readline()
-            if a == "":
-                break
-            else:
-                k = string_to_dict(a, k)   
-        file.close
+        text = file.read()
+    k={}
+    for line in text.splitlines():
+        k = string_to_dict(line, k)
     return k
 
 
+@instrumented("load_dicts_from_files")
+def load_dicts_from_files(paths_or_glob, max_workers:int=None, as_dict:bool=False):
+    """Reads many dict files, ex: one per experiment, with load_dict_from_file. The files are read by a thread pool.
+
+        df = load_dicts_from_files("data_treated/*/parameters.txt")
+
+    In the table, the columns with quantities are parsed as in split_quantity_columns, i.e. a column where
+    all the values are quantities with the same unit is converted to floats.
+
+    Args:
+        paths_or_glob (str | list[Path]): paths to the files, or a glob pattern.
+        max_workers (int, optional): number of threads. Defaults to None, i.e. the ThreadPoolExecutor default.
+        as_dict (bool, optional): return the dicts instead of a table. Defaults to False.
+
+    Returns:
+        DataFrame: one row per file, the first column is the path. The units of the float columns are in df.attrs["units"].
+        dict: if as_dict, the path and the dict of each file.
+    """
+    if isinstance(paths_or_glob, (str, os.PathLike)):
+        paths = sorted(glob.glob(str(paths_or_glob), recursive=True))
+    else:
+        paths = list(paths_or_glob)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        dicts = list(pool.map(load_dict_from_file, paths))
+    if as_dict:
+        return {Path(path): k for path, k in zip(paths, dicts)}
+    df = pd.DataFrame(dicts)
+    df.insert(0, "path", [str(p) for p in paths])
+    units = {}
+    quantity_columns = []
+    for col in df.columns[1:]:
+        cells = df[col].dropna()
+        if not any(isinstance(v, Q) for v in cells) or not all(isinstance(v, (Q, str)) for v in cells):
+            continue
+        df[col], unit = _quantity_column(df[col])
+        if unit is not None:
+            units[col] = unit
+        quantity_columns.append(col)
+    # the other text columns are parsed a whole column at a time.
+    text = split_quantity_columns(df.drop(columns=quantity_columns))
+    df[text.columns] = text
+    df.attrs["units"] = {**text.attrs["units"], **units}
+    return df
+
+
+def _quantity_column(column: pd.Series):
+    """Returns the floats and the unit of a column of quantities with the same unit, 
+    otherwise the quantities and None. The text cells that are quantities are parsed, ex: from a file without types.
+    """
+    cells = column.to_numpy(dtype=object, copy=True)
+    for i, v in enumerate(cells):
+        if isinstance(v, str):
+            p = _split_quantity(v)
+            if p is not None:
+                cells[i] = Q(*p)
+    is_quantity = [isinstance(v, Q) for v in cells]
+    column_units = {v._unit for v in cells[is_quantity]}
+    if len(column_units) == 1 and all(q or pd.isna(v) for q, v in zip(is_quantity, cells)):
+        return np.array([v.value if q else np.nan for q, v in zip(is_quantity, cells)], dtype=float), str(column_units.pop())
+    return cells, None
+
+
 ###########################################################################################
 
+_DIGITS = r"\d+(?:_\d+)*"
+INT_PATTERN = re.compile(rf"[-+]?{_DIGITS}")
+FLOAT_PATTERN = re.compile(rf"[-+]?(?:(?:{_DIGITS}(?:\.(?:{_DIGITS})?)?|\.{_DIGITS})(?:[eE][-+]?{_DIGITS})?|nan|inf|infinity)", re.IGNORECASE)
+VALUE_UNIT_PATTERN = re.compile(r"(\S+) +(.+)")
+
 
 def string_to_dict(s:str, k: dict):
+    key, value = _split_line(s)
+    if key is not None:
+        k[key] = parse_value(value)
+    return k
+
+
+def _split_line(s:str):
+    """Returns the key and the value text of a "key = value" line, or None, None."""
     vals = s.split("=",1)
     if len(vals)>=2:
         key= str(vals[0]).strip().strip().replace("'","").replace('"',"").strip()
-        v=vals[1].strip()
+        return key, vals[1].strip()
+    return None, None
+
+
+def parse_value(v: str):
+    """Converts a text value to an int, a float, a quantity or a string, in this order.
+
+    Args:
+        v (str): the value, without surrounding white space.
+    """
+    if INT_PATTERN.fullmatch(v):
+        return int(v)
+    if FLOAT_PATTERN.fullmatch(v):
+        return float(v)
+    m = VALUE_UNIT_PATTERN.fullmatch(v)
+    if m and FLOAT_PATTERN.fullmatch(m.group(1)):
         try:
-            k[key]=int(v)
+            return Q(v)
         except ValueError:
-            try:
-                k[key]=float(v)
-            except ValueError:
-                try:
-                    k[key]=Q(v)
-                except:    
-                    k[key] = vals[1].strip()
-        #k[key] = vals[1].strip()    
-    return k
+            pass  # the unit can not be parsed, ex: "5 m^x"
+    return v
+
+
+def _split_quantity(text: str):
+    """Returns the value and the unit of a quantity, ex: "1.5 mol /L", or None. The unit must parse, ex: not "3 a^b"."""
+    parts = text.split(None, 1)
+    if len(parts) == 2 and FLOAT_PATTERN.fullmatch(parts[0]):
+        unit = parts[1].strip()
+        try:
+            parse_unit(unit)
+        except ValueError:
+            return None
+        return float(parts[0]), unit
+    return None
+
+
+def typed_path(file_path: Path) -> Path:
+    """Path to the typed sidecar of a dict file."""
+    file_path = Path(file_path)
+    return file_path.with_name(file_path.name + TYPED_SUFFIX)
+
+
+def _to_typed(value):
+    # numpy scalars, ex: np.int64 and np.bool_, are not int or bool instances.
+    if isinstance(value, (bool, np.bool_)):
+        return {"type": "bool", "value": bool(value)}
+    if isinstance(value, numbers.Integral):
+        return {"type": "int", "value": int(value)}
+    if isinstance(value, numbers.Real):
+        # json has no nan or inf.
+        return {"type": "float", "value": repr(float(value))}
+    if isinstance(value, Q):
+        return {"type": "quantity", "value": repr(value.value), "unit": str(value._unit)}
+    return {"type": "str", "value": str(value)}
+
+
+def _from_typed(item):
+    t = item["type"]
+    if t == "float":
+        return float(item["value"])
+    if t == "quantity":
+        return Q(float(item["value"]), item["unit"])
+    return item["value"]
+
+
+def _load_typed_dict(file_path: Path):
+    """Returns the dict from the typed sidecar, or None if there is none or it is older than the text file."""
+    path = typed_path(file_path)
+    try:
+        if path.stat().st_mtime_ns < os.stat(file_path).st_mtime_ns:
+            return None
+    except FileNotFoundError:
+        return None
+    with open(path, 'r', encoding="utf-8") as file:
+        items = json.load(file)
+    return {k: _from_typed(item) for k, item in items.items()}
 
 
 def open_dict_from_tablefile(file_path:Path):
-    """_summary_
+    """Reads a table file saved with save_dict_to_tableFile.
+
+    Columns with quantities, ex: "10.5 nm", are parsed column-wise, see split_quantity_columns.
 
     Args:
-        file_path (Path): _description_
+        file_path (Path): path to the table file.
+
+    Returns:
+        DataFrame: one row per sample. The units of the float columns are in df.attrs["units"].
+    """
+    if journal_path(file_path).exists() or shard_paths(file_path):
+        df = TableStore(file_path, UNIQUE_KEY, delimiter=",").to_DataFrame()
+    else:
+        df = pd.read_csv(file_path)
+    return split_quantity_columns(df)
+
+
+def split_quantity_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Parses the text columns with quantities, ex: "1.5e-3 mol /L", a whole column at a time.
+
+    - If all the cells of a column are quantities with the same unit, the column is converted to floats 
+        and the unit is stored in df.attrs["units"][column].
+
+    - Otherwise, the cells that are quantities are converted to Quantity_Value_Unit and the other cells are kept.
+
+    Args:
+        df (DataFrame): the table. It is changed in place.
 
     Returns:
-        DataFrame: _description_
+        DataFrame: the table.
     """
-    df = pd.read_csv(file_path)
-    for col in df.columns:
-    #print(df[col].dtypes)
-        for i in range(df.index.max()):
-            if df[col].dtypes == object:
-                o = df.iloc[i][col]
-                try:
-                    #print(df[col].dtypes,o,"fdsfsa",Q(o), "YES")
-                    df.iloc[i][col]=Q(o)
-                except:
-                    print(df[col].dtypes,o,"", "no")
+    units = df.attrs.setdefault("units", {})
+    for col in df.columns[1:]:
+        if not pd.api.types.is_string_dtype(df[col].dtype):
+            continue
+        # each distinct text is only parsed once.
+        codes, texts = pd.factorize(df[col])
+        parsed = [_split_quantity(str(text)) for text in texts]
+        is_quantity = np.array([p is not None for p in parsed] + [False])[codes]  # code -1 is NaN
+        if not is_quantity.any():
+            continue
+        values = np.array([p[0] if p else np.nan for p in parsed] + [np.nan])[codes]
+        units_of_texts = [p[1] if p else None for p in parsed]
+        column_units = {units_of_texts[c] for c in np.unique(codes[is_quantity])}
+        if is_quantity.sum() == (codes >= 0).sum() and len(column_units) == 1:
+            df[col] = values
+            units[col] = column_units.pop()
+        else:
+            column = df[col].to_numpy(dtype=object, copy=True)
+            for i in np.flatnonzero(is_quantity):
+                column[i] = Q(values[i], units_of_texts[codes[i]])
+            df[col] = column
     return df
 
-def save_dict_to_tableFile(file_path:Path, sample_name:str, properties:dict, delimiter:str=DELIMITER):
+@instrumented("save_dict_to_tableFile")
+def save_dict_to_tableFile(file_path:Path, sample_name:str, properties:dict, delimiter:str=DELIMITER, journal:bool=False, shard=None):
     """Saves key values into a csv. The function add a row, or replace an existing row based on the 
     sample name. The first column will always be called "name". The following columns will have the name of the key of the dict.
 
+    To save many samples at once, use TableStore.upsert_many, which only writes the file once.
+
     Args:
         file_path (Path): _description_
         sample_name (str): _description_
         properties (dict): _description_
         delimiter (str, optional): _description_. Defaults to DELIMITER.
+        journal (bool, optional): append the row to the journal of the file instead of rewriting the file.
+            The journal is merged when the table is read, and folded into the file by compact_tableFile. Defaults to False.
+        shard (str | bool, optional): write the row to a shard file of this worker, "<file>.shard-<id>", instead of the file.
+            Use True for an id from the host name and the process id. Parallel workers then never write to the same file.
+            The shards are merged when the table is read, and folded into the file by compact_tableFile. Defaults to None.
     """
     file_path = Path(file_path)
-    unique_key="name"
+    if journal:
+        journal_upsert(file_path, sample_name, properties, UNIQUE_KEY)
+        return
+    if shard is not None and shard is not False:
+        with TableStore(shard_path(file_path, shard), UNIQUE_KEY, delimiter=",", lock=True) as store:
+            store.upsert(sample_name, properties)
+        return
     if not file_path.exists():
-        with open(file_path, 'w') as file:
-            file.write(f"{unique_key}\n")    
-        file.close
         print(f"File Path: {file_path}\n")
         print(f"File was created")
-    try:    
-        df = pd.read_csv(file_path)
-    except Exception as e:
-        print(f"File Path: {file_path}\n")
-        print(f"File might be empty. Creating default header\n")
-        print("")
-        df = pd.DataFrame(columns=[unique_key])
+    # the lock is held from reading until the file is replaced, so that no row of another writer is lost.
+    with TableStore(file_path, UNIQUE_KEY, delimiter=",", lock=True) as store:
+        if sample_name in store:
+            print(sample_name, "was already in the list: updating")
+        else:
+            print(sample_name, "was added")
+        store.upsert(sample_name, properties)
+
 
-    cols = list(df.columns)
-    if(cols[0] != unique_key):
-        df=df.rename(columns={cols[0]: unique_key})
-        warnings.warn(f"The first column has been renamed to '{unique_key}'")
 
-    properties[unique_key]=sample_name
-    df = add_dict_to_DataFrame(df,properties)
-    df.to_csv(file_path, index=False,sep=",")
+def compact_tableFile(file_path:Path):
+    """Folds the shards and the journal of a table file into the file.
 
+    Args:
+        file_path (Path): path to the table file.
+    """
+    TableStore(file_path, UNIQUE_KEY, delimiter=",").compact()
 
 
 def append_row(df, row):
@@ -0,0 +1,116 @@
+"""
+Advisory file locks and atomic file writes.
+
+A lock on a file is taken on a separate lock file next to it, "<file>.lock", so that the file itself can be
+replaced while the lock is held. The locks are advisory, i.e. they only protect against writers that also use them.
+"""
+
+from contextlib import contextmanager
+from pathlib import Path
+import os
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+LOCK_SUFFIX = ".lock"
+
+DEFAULT_FILE_MODE = 0o644
+
+_held = {}
+_held_guard = threading.Lock()
+
+
+def lock_path(file_path: Path) -> Path:
+    """Path to the lock file of a file."""
+    file_path = Path(file_path)
+    return file_path.with_name(file_path.name + LOCK_SUFFIX)
+
+
+def _lock_fd(fd: int):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+    else:
+        while True:
+            try:
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                # msvcrt gives up after 10 s.
+                time.sleep(0.1)
+
+
+def _unlock_fd(fd: int):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def file_lock(file_path: Path):
+    """Exclusive lock of a file, between processes and between threads.
+    The lock is reentrant, i.e. the same thread can take it again.
+
+        with file_lock(path):
+            # read-modify-write path
+
+    Args:
+        file_path (Path): file to lock.
+    """
+    path = str(lock_path(Path(file_path).absolute()))
+    with _held_guard:
+        entry = _held.setdefault(path, [threading.RLock(), 0, None])
+    entry[0].acquire()
+    try:
+        if entry[1] == 0:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, DEFAULT_FILE_MODE)
+            try:
+                _lock_fd(fd)
+            except BaseException:
+                os.close(fd)
+                raise
+            entry[2] = fd
+        entry[1] += 1
+        try:
+            yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                fd, entry[2] = entry[2], None
+                _unlock_fd(fd)
+                os.close(fd)
+    finally:
+        entry[0].release()
+
+
+@contextmanager
+def atomic_write(file_path: Path, mode: str = "w", **kwargs):
+    """Writes to a temporary file in the same folder, which replaces the file when the block ends without error.
+    Readers therefore never see a partly written file.
+
+        with atomic_write(path, newline="") as file:
+            file.write(...)
+
+    Args:
+        file_path (Path): file to write.
+        mode (str, optional): "w" or "wb". Defaults to "w".
+        kwargs: passed on to open(), ex: newline or encoding.
+    """
+    file_path = Path(file_path)
+    file_mode = file_path.stat().st_mode if file_path.exists() else DEFAULT_FILE_MODE
+    fd, tmp_path = tempfile.mkstemp(dir=file_path.parent, prefix=f".{file_path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, **kwargs) as file:
+            yield file
+        os.chmod(tmp_path, file_mode)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
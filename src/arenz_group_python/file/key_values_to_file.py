@@ -2,7 +2,9 @@
 import csv
 from pathlib import Path
 from ..project.util_paths import Project_Paths
-import re
+from .table_store import append_to_journal, read_journal, remove_from_journal
+from .file_lock import file_lock, atomic_write
+from ..instrumentation import instrumented
 
 
 DELIMITER = '\t'
@@ -10,7 +12,7 @@ DELIMITER = '\t'
 
 
 
-def save_key_values(file_path:Path, sample_name:str, properties:list, delimiter:str=DELIMITER):
+def save_key_values(file_path:Path, sample_name:str, properties:list, delimiter:str=DELIMITER, journal:bool=False):
     """Saves key values into a csv. The function add a row, or replace an existing row based on the 
     sample name. The first column will always sample name. The following columns will be the list values.
 
@@ -18,60 +20,105 @@ def save_key_values(file_path:Path, sample_name:str, properties:list, delimiter:
         file_path (Path): Path to data file or relative path
         sample_name (str): Name of sample, will be the first column of the row.
         properties (list): List of values to be stored on the same row
+        journal (bool, optional): append the row to the journal of the file instead of rewriting the file.
+            The journal is merged by load_key_values, and folded into the file by compact_key_values. Defaults to False.
 
     Returns:
         _type_: _description_
     """
+    return save_key_values_many(file_path, {sample_name: properties}, delimiter, journal)
+
+
+@instrumented("save_key_values_many")
+def save_key_values_many(file_path:Path, rows:dict, delimiter:str=DELIMITER, journal:bool=False):
+    """Saves the rows of many samples, see save_key_values. The file is only read and written once.
+
+    Args:
+        file_path (Path): Path to data file or relative path
+        rows (dict): sample name and list of values.
+        journal (bool, optional): append the rows to the journal of the file instead of rewriting the file. Defaults to False.
+    """
     if file_path == "":
         print( "empty path ")
         return False
-    p = file_path
-    if isinstance(file_path,str):
-        p = Path(file_path)
+    p = _key_values_path(file_path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    if journal:
+        for sample_name, properties in rows.items():
+            append_to_journal(p, {"name": sample_name, "values": [str(v) for v in properties]})
+        return
+    with file_lock(p):
+        new_file = not p.exists()
+        # an exact match on the sample name, in the order of the file.
+        data = _read_key_values(p, delimiter)
+        records, size = read_journal(p)
+        for record in records:
+            data[record["name"]] = record["values"]
+        updated = sum(1 for sample_name in rows if sample_name in data)
+        for sample_name, properties in rows.items():
+            data[sample_name] = list(properties)
+        _write_key_values(p, data, delimiter)
+        remove_from_journal(p, size)
+    # one line per call, not per row.
+    print(f"{'new file ' if new_file else ''}{p}: {len(rows) - updated} rows added, {updated} rows updated")
+    return
+
+
+def _key_values_path(file_path:Path) -> Path:
+    """Relative paths are relative to the treated data folder."""
+    p = Path(file_path)
     if not p.is_absolute():
-        pa = Project_Paths()._treated_data_path()
         pa = Path(str(Project_Paths()._treated_data_path()))
-        #print(pa)
         p= pa.joinpath(p)
+    return p
+
+
+def load_key_values(file_path:Path, delimiter:str=DELIMITER):
+    """Reads a file saved with save_key_values, and merges its journal.
+
+    Args:
+        file_path (Path): Path to data file or relative path
 
-    
-    all_data =[]
-    sample = "\"" + sample_name + "\""
-    new_row = [sample] + properties
-    sample_already_in_dataset= False
-    #print(p)
-    #read in the whole file and check each row.
-    if p.exists:    
+    Returns:
+        dict: sample name and list of values.
+    """
+    p = _key_values_path(file_path)
+    data = _read_key_values(p, delimiter)
+    records, size = read_journal(p)
+    for record in records:
+        data[record["name"]] = record["values"]
+    return data
+
+
+def compact_key_values(file_path:Path, delimiter:str=DELIMITER):
+    """Folds the journal of a file saved with save_key_values into the file.
+
+    Args:
+        file_path (Path): Path to data file or relative path
+    """
+    p = _key_values_path(file_path)
+    with file_lock(p):
+        data = _read_key_values(p, delimiter)
+        records, size = read_journal(p)
+        for record in records:
+            data[record["name"]] = record["values"]
+        _write_key_values(p, data, delimiter)
+        remove_from_journal(p, size)
+
+
+def _read_key_values(p:Path, delimiter:str=DELIMITER) -> dict:
+    data = {}
+    if p.exists():
         with open(p, 'r', newline='') as csvfile:
-            #reads the file
-            spamreader = csv.reader(csvfile, delimiter=DELIMITER, quotechar='|')
-
-            all_data =[]
-            i=0
-            sample_already_in_dataset = False
-            for row in spamreader:
-                all_data.append(row)
-                sa = re.search(sample_name, row[0])
-                if sa :
-                    print("sample name found -  updating row")
-                    all_data[i] = new_row
-                    sample_already_in_dataset= True
-                i+=1
-            if not sample_already_in_dataset:
-                print("sample not found -  adding row")
-                all_data.append(new_row)
-            csvfile.close()   
-    else:
-        print("new file.")
-        all_data.append(new_row)
-
-    #print(all_data) 
-    with open(p, 'w', newline='') as csvfile:
-        spamwriter = csv.writer(csvfile, delimiter=DELIMITER,
+            for row in csv.reader(csvfile, delimiter=delimiter, quotechar='|'):
+                if len(row) > 0:
+                    data[row[0].strip('"')] = row[1:]
+    return data
+
+
+def _write_key_values(p:Path, data:dict, delimiter:str=DELIMITER):
+    with atomic_write(p, newline='') as csvfile:
+        spamwriter = csv.writer(csvfile, delimiter=delimiter,
                                 quotechar='|', quoting=csv.QUOTE_MINIMAL)
-        for row in all_data:
-            spamwriter.writerow(row) #row
-        csvfile.close()
-    print(p)
-    return
-                
\ No newline at end of file
+        for sample_name, values in data.items():
+            spamwriter.writerow(["\"" + sample_name + "\""] + list(values))
@@ -0,0 +1,134 @@
+"""
+Table of samples in a Parquet file.
+
+The same upsert semantics as save_dict_to_tableFile, i.e. one row per sample name, but the values keep their types
+and the units of the quantity columns are stored in the schema metadata.
+A table can be loaded with only some of the columns and only some of the samples, which is read directly from the file.
+
+Parquet needs pyarrow, which is an optional dependency:
+
+    pip install arenz_group_python[parquet]
+"""
+
+from pathlib import Path
+import json
+
+import pandas as pd
+
+from ..data_treatment.util import Quantity_Value_Unit as Q
+from ..data_treatment.units import convert
+from ..instrumentation import instrumented
+from .file_lock import file_lock, atomic_write
+from .table_store import UNIQUE_KEY
+
+UNITS_METADATA_KEY = b"arenz_group_python.units"
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Parquet files need pyarrow: pip install arenz_group_python[parquet]") from e
+    return pyarrow, pyarrow.parquet
+
+
+def save_dict_to_parquetFile(file_path:Path, sample_name:str, properties:dict, key:str=UNIQUE_KEY):
+    """Adds a row, or replaces the row of an existing sample, in a Parquet file.
+
+    Args:
+        file_path (Path): path to the Parquet file. It is created if it does not exist.
+        sample_name (str): name of the sample.
+        properties (dict): column name and value. Quantity_Value_Unit values are stored as floats with the unit in the schema.
+        key (str, optional): name of the first column. Defaults to "name".
+    """
+    save_dicts_to_parquetFile(file_path, {sample_name: properties}, key)
+
+
+@instrumented("save_dicts_to_parquetFile")
+def save_dicts_to_parquetFile(file_path:Path, rows:dict, key:str=UNIQUE_KEY):
+    """Adds or replaces many rows of a Parquet file. The file is only written once.
+
+    Args:
+        file_path (Path): path to the Parquet file. It is created if it does not exist.
+        rows (dict): sample name and properties.
+        key (str, optional): name of the first column. Defaults to "name".
+
+    Raises:
+        ValueError: if the unit of a quantity can not be converted to the unit of its column.
+    """
+    if not rows:
+        return
+    pa, pq = _import_pyarrow()
+    file_path = Path(file_path)
+    with file_lock(file_path):
+        if file_path.exists():
+            df = load_parquetFile(file_path, key=key)
+            units = dict(df.attrs.get("units", {}))
+        else:
+            df = pd.DataFrame({key: pd.Series(dtype=str)})
+            units = {}
+        new_rows = [_to_row(sample_name, properties, key, units) for sample_name, properties in rows.items()]
+        new = pd.DataFrame(new_rows)
+        df = df[~df[key].isin(new[key])]
+        df = pd.concat([df, new], ignore_index=True) if len(df) else new
+        df = _arrow_compatible(df)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        metadata = dict(table.schema.metadata or {})
+        metadata[UNITS_METADATA_KEY] = json.dumps(units).encode()
+        table = table.replace_schema_metadata(metadata)
+        with atomic_write(file_path, "wb") as file:
+            pq.write_table(table, file)
+
+
+def load_parquetFile(file_path:Path, columns:list=None, names:list=None, key:str=UNIQUE_KEY) -> pd.DataFrame:
+    """Reads a Parquet file saved with save_dict_to_parquetFile.
+
+    Args:
+        file_path (Path): path to the Parquet file.
+        columns (list, optional): only read these columns, and the name column. Defaults to None, i.e. all.
+        names (list, optional): only read the rows of these samples. Defaults to None, i.e. all.
+        key (str, optional): name of the first column. Defaults to "name".
+
+    Returns:
+        DataFrame: one row per sample. The units of the quantity columns are in df.attrs["units"].
+    """
+    pa, pq = _import_pyarrow()
+    if columns is not None:
+        columns = [key] + [c for c in columns if c != key]
+    filters = [(key, "in", [str(n) for n in names])] if names is not None else None
+    table = pq.read_table(file_path, columns=columns, filters=filters)
+    df = table.to_pandas()
+    units = json.loads((table.schema.metadata or {}).get(UNITS_METADATA_KEY, b"{}"))
+    df.attrs["units"] = {col: unit for col, unit in units.items() if col in df.columns}
+    return df
+
+
+#####################################################################################################################
+def _to_row(sample_name, properties:dict, key:str, units:dict) -> dict:
+    """Converts the quantities to floats in the unit of their column. New quantity columns are added to units."""
+    row = {key: str(sample_name)}
+    for k, v in properties.items():
+        k = str(k)
+        if k == key:
+            continue
+        if isinstance(v, Q):
+            unit = str(v._unit)
+            if k not in units:
+                units[k] = unit
+            v = convert(v.value, unit, units[k]) if unit != units[k] else v.value
+        elif k in units and isinstance(v, (int, float)) and not isinstance(v, bool):
+            v = float(v)
+        row[k] = v
+    return row
+
+
+def _arrow_compatible(df: pd.DataFrame) -> pd.DataFrame:
+    """Columns with values of different types are stored as text."""
+    for col in df.columns:
+        if df[col].dtype != object:
+            continue
+        cells = df[col].dropna()
+        if cells.map(type).nunique() > 1:
+            df[col] = df[col].map(lambda v: v if v is None or v != v else str(v))
+    return df
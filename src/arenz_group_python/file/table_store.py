@@ -0,0 +1,333 @@
+"""
+Table file with one row per sample.
+
+The file is read once into memory, with an index from the sample name to the row.
+Any number of rows can then be added or updated before the file is written back once.
+
+Updates can also be appended to a journal file next to the table, one line per update, 
+instead of rewriting the table. The journal is merged when the table is loaded, the last update of a sample wins,
+and the journal is folded into the table file whenever the table is written, ex: by compact().
+
+Writers that share a table file take an advisory lock on it (see file_lock.py). To not wait for each other,
+each worker can instead write its own shard file, "<file>.shard-<id>", which is merged when the table is loaded.
+A shard is only removed after merging if its content has not changed since it was read.
+"""
+
+from pathlib import Path
+import csv
+import hashlib
+import io
+import json
+import os
+import socket
+import warnings
+
+import pandas as pd
+
+from ..instrumentation import instrumented
+from .file_lock import file_lock, atomic_write, LOCK_SUFFIX
+
+UNIQUE_KEY = "name"
+
+JOURNAL_SUFFIX = ".journal"
+SHARD_SUFFIX = ".shard-"
+
+
+def _to_cell(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float) and value != value:  # NaN
+        return ""
+    return str(value)
+
+
+def journal_path(file_path: Path) -> Path:
+    """Path to the journal of a table file."""
+    file_path = Path(file_path)
+    return file_path.with_name(file_path.name + JOURNAL_SUFFIX)
+
+
+def append_to_journal(file_path: Path, record: dict):
+    """Appends one record as a json line to the journal of a table file."""
+    line = json.dumps(record, ensure_ascii=False) + "\n"
+    with file_lock(file_path):
+        with open(journal_path(file_path), "a", encoding="utf-8") as file:
+            file.write(line)
+
+
+def journal_upsert(file_path: Path, sample_name: str, properties: dict, key: str = UNIQUE_KEY):
+    """Adds or replaces a row of a table file by appending one line to its journal. The table file is not read.
+
+    Args:
+        file_path (Path): path to the table file.
+        sample_name (str): name of the sample.
+        properties (dict): column name and value.
+        key (str, optional): name of the first column. Defaults to "name".
+    """
+    row = {str(k): _to_cell(v) for k, v in properties.items() if str(k) != key}
+    append_to_journal(file_path, {key: str(sample_name), "properties": row})
+
+
+def read_journal(file_path: Path):
+    """Reads the complete lines of the journal of a table file.
+
+    Returns:
+        records (list): the records in the order they were appended.
+        size (int): number of bytes that were read.
+    """
+    records, size, _ = _read_journal(file_path)
+    return records, size
+
+
+def _read_journal(file_path: Path):
+    path = journal_path(file_path)
+    if not path.exists():
+        return [], 0, None
+    with open(path, "rb") as file:
+        data = file.read()
+    # an incomplete last line is a write in progress, it is read next time.
+    size = data.rfind(b"\n") + 1
+    records = [json.loads(line) for line in data[:size].decode("utf-8").splitlines() if line.strip()]
+    return records, size, _file_digest(data[:size])
+
+
+def remove_from_journal(file_path: Path, size: int, digest: bytes = None):
+    """Removes the first size bytes, i.e. the records that have been written to the table file.
+
+    Args:
+        file_path (Path): path to the table file.
+        size (int): number of bytes to remove.
+        digest (bytes, optional): digest of the bytes when they were read. Nothing is removed if they have changed since, 
+            ex: the journal was compacted by another process. Defaults to None, i.e. not checked.
+    """
+    path = journal_path(file_path)
+    if size == 0 or not path.exists():
+        return
+    with file_lock(file_path):
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+        except FileNotFoundError:
+            return
+        if digest is not None and _file_digest(data[:size]) != digest:
+            return
+        rest = data[size:]
+        if rest:
+            with atomic_write(path, "wb") as file:
+                file.write(rest)
+        else:
+            os.remove(path)
+
+
+def shard_path(file_path: Path, shard = True) -> Path:
+    """Path to a shard of a table file.
+
+    Args:
+        file_path (Path): path to the table file.
+        shard (str | bool, optional): id of the shard. Defaults to True, i.e. an id from the host name and the process id.
+    """
+    file_path = Path(file_path)
+    if shard is True:
+        shard = f"{socket.gethostname()}-{os.getpid()}"
+    return file_path.with_name(f"{file_path.name}{SHARD_SUFFIX}{shard}")
+
+
+def shard_paths(file_path: Path) -> list[Path]:
+    """The shards of a table file, the oldest first."""
+    file_path = Path(file_path)
+    shards = []
+    for p in file_path.parent.glob(f"{file_path.name}{SHARD_SUFFIX}*"):
+        if p.name.endswith(LOCK_SUFFIX):
+            continue
+        try:
+            shards.append((p.stat().st_mtime_ns, p))
+        except FileNotFoundError:
+            pass
+    return [p for _, p in sorted(shards)]
+
+
+def _file_digest(data: bytes) -> bytes:
+    # the content is compared, not the modification time, which is too coarse on some file systems, ex: FAT and SMB.
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+class TableStore:
+    """A csv file with one row per sample. The first column is the sample name.
+
+        with TableStore("extracted_values.csv", lock=True) as table:
+            for name, properties in results.items():
+                table.upsert(name, properties)
+
+    The file is written when the with-block ends, or when flush() is called.
+    """
+
+    def __init__(self, file_path: Path, key: str = UNIQUE_KEY, delimiter: str = ",", lock: bool = False):
+        """
+        Args:
+            file_path (Path): path to the table file. It is created by flush() if it does not exist.
+            key (str, optional): name of the first column. Defaults to "name".
+            delimiter (str, optional): Defaults to ",".
+            lock (bool, optional): hold a lock on the file from loading until close(), or the end of the with-block. 
+                Use it for read-modify-write when other processes write to the same file. Defaults to False.
+        """
+        self.file_path = Path(file_path)
+        self.key = key
+        self.delimiter = delimiter
+        self.columns = [key]
+        self.rows = {}
+        self._journal_size = 0
+        self._journal_digest = None
+        self._shards = {}
+        self._lock = None
+        if lock:
+            self._lock = file_lock(self.file_path)
+            self._lock.__enter__()
+        try:
+            self.load()
+        except BaseException:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                self.flush()
+        finally:
+            self.close()
+
+    def close(self):
+        """Releases the lock, if any. Unsaved changes are not written."""
+        if self._lock is not None:
+            lock, self._lock = self._lock, None
+            lock.__exit__(None, None, None)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __contains__(self, sample_name) -> bool:
+        return str(sample_name) in self.rows
+
+    #####################################################################################################################
+    def load(self):
+        """Reads the file and merges the shards and the journal. Unsaved changes are lost."""
+        self.columns = [self.key]
+        self.rows = {}
+        if self.file_path.exists():
+            with open(self.file_path, "r", newline="") as file:
+                self._read_rows(file, rename_warning=True)
+        self._shards = {}
+        for path in shard_paths(self.file_path):
+            try:
+                with open(path, "rb") as file:
+                    data = file.read()
+            except FileNotFoundError:
+                continue
+            # the same default encoding as open().
+            self._read_rows(io.TextIOWrapper(io.BytesIO(data), newline=""))
+            self._shards[path] = _file_digest(data)
+        records, self._journal_size, self._journal_digest = _read_journal(self.file_path)
+        for record in records:
+            self.upsert(record[self.key], record["properties"])
+
+    def _read_rows(self, file, rename_warning: bool = False):
+        reader = csv.reader(file, delimiter=self.delimiter)
+        header = next(reader, None)
+        if not header:
+            return
+        if header[0] != self.key and rename_warning:
+            warnings.warn(f"The first column has been renamed to '{self.key}'")
+        columns = header[1:]
+        for col in columns:
+            if col not in self.columns:
+                self.columns.append(col)
+        for row in reader:
+            if len(row) == 0:
+                continue
+            self.rows[row[0]] = dict(zip(columns, row[1:]))
+
+    def append(self, sample_name: str, properties: dict):
+        """Adds or replaces a row by appending one line to the journal. The table file is not rewritten.
+        The row is also updated in memory.
+
+        Args:
+            sample_name (str): name of the sample.
+            properties (dict): column name and value.
+        """
+        self.upsert(sample_name, properties)
+        journal_upsert(self.file_path, sample_name, properties, self.key)
+
+    def compact(self):
+        """Folds the shards and the journal into the table file, and removes them."""
+        with file_lock(self.file_path):
+            self.load()
+            self.flush()
+
+    def upsert(self, sample_name: str, properties: dict):
+        """Adds a row, or replaces the row of an existing sample. New keys are added as columns.
+
+        Args:
+            sample_name (str): name of the sample.
+            properties (dict): column name and value.
+        """
+        row = {}
+        for k, v in properties.items():
+            k = str(k)
+            if k == self.key:
+                continue
+            if k not in self.columns:
+                self.columns.append(k)
+            row[k] = _to_cell(v)
+        self.rows[str(sample_name)] = row
+
+    def upsert_many(self, rows):
+        """Adds or replaces many rows.
+
+        Args:
+            rows (dict | list): sample name and properties, as a dict or a list of (sample_name, properties).
+        """
+        items = rows.items() if isinstance(rows, dict) else rows
+        for sample_name, properties in items:
+            self.upsert(sample_name, properties)
+
+    @instrumented("TableStore.flush")
+    def flush(self):
+        """Writes the table to a temporary file, which then replaces the file.
+        The shards and the journal records that were merged when loading are removed, 
+        unless they have been changed by another writer since.
+        """
+        # without lock=True the file may have been changed since loading, the lock only keeps the write and the trim together.
+        with file_lock(self.file_path):
+            with atomic_write(self.file_path, newline="") as file:
+                self._write(file)
+            # the shards and the journal records that were loaded are now in the table file.
+            # the lock of a shard is also held by its writer, i.e. a shard can not be rewritten between the check and the removal.
+            for path, digest in self._shards.items():
+                with file_lock(path):
+                    try:
+                        with open(path, "rb") as file:
+                            if _file_digest(file.read()) == digest:
+                                os.remove(path)
+                    except FileNotFoundError:
+                        pass
+            self._shards = {}
+            remove_from_journal(self.file_path, self._journal_size, self._journal_digest)
+            self._journal_size = 0
+            self._journal_digest = None
+
+    def _write(self, file):
+        writer = csv.writer(file, delimiter=self.delimiter)
+        writer.writerow(self.columns)
+        for name, row in self.rows.items():
+            writer.writerow([name] + [row.get(col, "") for col in self.columns[1:]])
+
+    def to_DataFrame(self) -> pd.DataFrame:
+        """Returns:
+            DataFrame: the table, with the same types as pd.read_csv of the file.
+        """
+        buffer = io.StringIO()
+        self._write(buffer)
+        buffer.seek(0)
+        return pd.read_csv(buffer, sep=self.delimiter)
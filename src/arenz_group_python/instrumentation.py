@@ -0,0 +1,219 @@
+"""
+Opt-in timing of the stages of the analysis pipeline.
+
+    from arenz_group_python import instrumentation
+
+    instrumentation.enable()
+    AutoClaveSynthesis(path).AC_synthesis_metrics()
+    print(instrumentation.summary())
+    instrumentation.to_json_lines("timings.jsonl")
+
+Each stage records its wall time, CPU time (of the process) and, if memory is traced, the peak of the memory allocated
+by Python during the stage. Stages can be nested, ex: "AutoClaveSynthesis.clean_outliers" inside
+"AutoClaveSynthesis.AC_synthesis_table".
+
+The peak of tracemalloc is global to the process, so memory is only recorded by one thread at a time: the stages of the
+thread that opened the first stage, until its outermost stage ends. Their peaks include the memory allocated by all
+threads, ex: by the thread pool of load_dicts_from_files. Stages in the other threads have no peak.
+
+When it is disabled, which is the default, a stage costs one function call and no record is kept.
+It can also be enabled with the environment variable ARENZ_INSTRUMENT=1, or ARENZ_INSTRUMENT=memory to also trace memory.
+"""
+
+from functools import wraps
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+_state = {"enabled": False, "memory": False, "started_tracing": False, "memory_thread": None}
+_records = []
+_records_lock = threading.Lock()
+_local = threading.local()
+
+
+def enable(memory: bool = False):
+    """Starts recording the stages.
+
+    Args:
+        memory (bool, optional): also record the peak memory of each stage with tracemalloc.
+            Python is slower while memory is traced. Defaults to False.
+    """
+    _state["memory"] = memory
+    _state["memory_thread"] = None
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _state["started_tracing"] = True
+    _state["enabled"] = True
+
+
+def disable():
+    """Stops recording. The records are kept until clear().
+    Memory tracing is only stopped if it was started by enable(), i.e. tracing started by the caller is not stopped.
+    """
+    _state["enabled"] = False
+    if _state["started_tracing"] and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _state["started_tracing"] = False
+    _state["memory"] = False
+
+
+def is_enabled() -> bool:
+    return _state["enabled"]
+
+
+def clear():
+    """Removes all records."""
+    with _records_lock:
+        _records.clear()
+
+
+def records() -> list[dict]:
+    """The records, one dict per stage in the order the stages ended.
+
+    Keys: "stage", "parent", "wall_s", "cpu_s", "peak_bytes" (None if memory was not traced) and the info of the stage.
+    """
+    with _records_lock:
+        return list(_records)
+
+
+def summary() -> dict:
+    """The records added up per stage.
+
+    Returns:
+        dict: stage name -> {"calls", "wall_s", "cpu_s", "peak_bytes"}, the peak is the max of the calls.
+    """
+    out = {}
+    for record in records():
+        s = out.setdefault(record["stage"], {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0, "peak_bytes": None})
+        s["calls"] += 1
+        s["wall_s"] += record["wall_s"]
+        s["cpu_s"] += record["cpu_s"]
+        if record["peak_bytes"] is not None:
+            s["peak_bytes"] = max(s["peak_bytes"] or 0, record["peak_bytes"])
+    return out
+
+
+def to_json_lines(file_path = None) -> str:
+    """The records as JSON lines, one line per record.
+
+    Args:
+        file_path (Path, optional): file the lines are appended to. Defaults to None, i.e. only return them.
+
+    Returns:
+        str: the lines.
+    """
+    lines = "".join(json.dumps(record, default=str) + "\n" for record in records())
+    if file_path is not None:
+        with open(file_path, "a", encoding="utf-8") as file:
+            file.write(lines)
+    return lines
+
+
+#####################################################################################################################
+class _NullStage:
+    """The stage used when the instrumentation is disabled."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+
+    def __init__(self, name: str, info: dict):
+        self.name = name
+        self.info = info
+
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        self.parent = stack[-1] if stack else None
+        stack.append(self)
+        self.memory = False
+        if _state["memory"] and tracemalloc.is_tracing():
+            thread = threading.get_ident()
+            with _records_lock:
+                if _state["memory_thread"] is None:
+                    _state["memory_thread"] = thread
+                self.memory = _state["memory_thread"] == thread
+        if self.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if self.parent is not None and self.parent.memory:
+                self.parent.peak = max(self.parent.peak, peak)
+            tracemalloc.reset_peak()
+            self.start_memory = current
+            self.peak = current
+        self.cpu = time.process_time()
+        self.wall = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        wall = time.perf_counter() - self.wall
+        cpu = time.process_time() - self.cpu
+        peak_bytes = None
+        if self.memory:
+            peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+            peak_bytes = peak - self.start_memory
+            if self.parent is not None and self.parent.memory:
+                # the peak of the parent includes the peak of this stage.
+                self.parent.peak = max(self.parent.peak, peak)
+            else:
+                with _records_lock:
+                    _state["memory_thread"] = None
+            tracemalloc.reset_peak()
+        _local.stack.pop()
+        record = {"stage": self.name, "parent": self.parent.name if self.parent else None,
+                  "wall_s": wall, "cpu_s": cpu, "peak_bytes": peak_bytes}
+        record.update(self.info)
+        with _records_lock:
+            _records.append(record)
+        return False
+
+
+def stage(name: str, **info):
+    """Context manager that records a stage.
+
+        with instrumentation.stage("load", path=str(path)):
+            ...
+
+    Args:
+        name (str): name of the stage.
+        info: json serializable values added to the record, ex: the path of the file.
+    """
+    if not _state["enabled"]:
+        return _NULL_STAGE
+    return _Stage(name, info)
+
+
+def instrumented(name: str = None):
+    """Decorator that records each call of a function as a stage.
+
+        @instrumented("AutoClaveSynthesis.load")
+        def load(...):
+
+    Args:
+        name (str, optional): name of the stage. Defaults to the qualified name of the function.
+    """
+    def decorator(func):
+        stage_name = name or func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _state["enabled"]:
+                return func(*args, **kwargs)
+            with _Stage(stage_name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+if os.environ.get("ARENZ_INSTRUMENT", "") not in ("", "0"):
+    enable(memory=os.environ.get("ARENZ_INSTRUMENT") == "memory")
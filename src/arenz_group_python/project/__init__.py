@@ -3,8 +3,9 @@ Module for creating default folder structure of a project.
 """
 
 from .util_paths import Project_Paths 
+from .tag_index import TagIndex
 
-__all__ = ["util_paths","Project_Paths"]
+__all__ = ["util_paths","Project_Paths", "TagIndex"]
 
 
 #Import the submodules
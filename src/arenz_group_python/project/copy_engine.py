@@ -0,0 +1,220 @@
+"""
+Copying of folder trees from the server, file by file in a thread pool.
+
+A file is skipped if it has been copied before and has not changed since, i.e. a sync only copies new and changed files.
+Each destination folder has a manifest with the size and modification time of each copied file,
+which is appended as soon as a file is copied, so that an interrupted sync continues where it stopped.
+The manifests are kept in the "copy_manifest" folder of the project cache, not in the destination folders.
+Files are copied to a temporary name first, i.e. a file that was only partly copied is never mistaken for a copy.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from fnmatch import fnmatch
+from pathlib import Path
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from ..instrumentation import instrumented
+
+MANIFEST_FOLDER = "copy_manifest"
+
+PART_SUFFIX = ".part"
+
+DEFAULT_MAX_WORKERS = 8
+"""Default number of parallel file copies. Network file systems are mostly limited by latency, not bandwidth."""
+
+MTIME_TOLERANCE_NS = 2 * 10**9
+"""Some file systems, ex: FAT and some SMB servers, store the modification time with a resolution of 2 s."""
+
+
+@dataclass
+class CopyStats:
+    """Summary of a sync."""
+    files_copied: int = 0
+    files_skipped: int = 0
+    bytes_copied: int = 0
+    seconds: float = 0.0
+    failed: list = field(default_factory=list)
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self.bytes_copied / self.seconds if self.seconds else 0.0
+
+    @property
+    def files_per_second(self) -> float:
+        return self.files_copied / self.seconds if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        return (f"{self.files_copied} files copied ({self.bytes_copied / 1e6:.1f} MB), {self.files_skipped} unchanged, "
+                f"{len(self.failed)} failed in {self.seconds:.1f} s: "
+                f"{self.bytes_per_second / 1e6:.2f} MB/s, {self.files_per_second:.1f} files/s")
+
+
+class _Manifest:
+    """The files copied to a destination folder, as path relative to the folder: (size, mtime_ns) of the source."""
+
+    def __init__(self, dest_dir: Path, manifest_dir: Path):
+        self.path = manifest_path(dest_dir, manifest_dir)
+        self.files = {}
+        self._lock = threading.Lock()
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # the last line of an interrupted sync
+                    self.files[record["path"]] = (record["size"], record["mtime_ns"])
+
+    def add(self, rel_path: str, size: int, mtime_ns: int):
+        line = json.dumps({"path": rel_path, "size": size, "mtime_ns": mtime_ns}, ensure_ascii=False) + "\n"
+        with self._lock:
+            self.files[rel_path] = (size, mtime_ns)
+            with open(self.path, "a", encoding="utf-8") as file:
+                file.write(line)
+
+    def compact(self):
+        """Rewrites the manifest with one line per file."""
+        with self._lock:
+            fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.", suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                for rel_path, (size, mtime_ns) in self.files.items():
+                    file.write(json.dumps({"path": rel_path, "size": size, "mtime_ns": mtime_ns}, ensure_ascii=False) + "\n")
+            os.replace(tmp_path, self.path)
+
+
+def manifest_path(dest_dir: Path, manifest_dir: Path) -> Path:
+    """Path to the manifest of a destination folder."""
+    name = hashlib.sha1(str(Path(dest_dir).absolute()).encode()).hexdigest()[:16]
+    return Path(manifest_dir) / f"{name}.jsonl"
+
+
+def _scan_files(src_dir: Path, ignore: tuple, failed: list):
+    """Yields the path relative to src_dir and the os.stat_result of each file in the tree.
+    Folders and files that can not be read are printed and added to failed, the rest of the tree is still scanned.
+    Links to folders are followed, as by shutil.copytree, except a link to a folder that is already scanned.
+    """
+    stack = [(Path(src_dir), "")]
+    visited = {os.path.realpath(src_dir)}
+    while stack:
+        directory, rel = stack.pop()
+        files = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    rel_path = f"{rel}{entry.name}"
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append((Path(entry.path), rel_path + "/"))
+                    elif entry.is_symlink() and entry.is_dir():
+                        real_path = os.path.realpath(entry.path)
+                        if real_path in visited:
+                            print("skipped link to a folder that is already copied:", entry.path)
+                            continue
+                        visited.add(real_path)
+                        stack.append((Path(entry.path), rel_path + "/"))
+                    elif not any(fnmatch(entry.name, pattern) for pattern in ignore):
+                        files.append((rel_path, entry))
+        except OSError as e:
+            print("failed to read:", directory, e)
+            failed.append(directory)
+        for rel_path, entry in files:
+            try:
+                stat = entry.stat()
+            except OSError as e:
+                print("failed to read:", entry.path, e)
+                failed.append(Path(entry.path))
+                continue
+            yield rel_path, stat
+
+
+def _is_unchanged(dest: Path, stat: os.stat_result, manifest: _Manifest, rel_path: str) -> bool:
+    if manifest.files.get(rel_path) == (stat.st_size, stat.st_mtime_ns):
+        return dest.exists()
+    try:
+        dest_stat = dest.stat()
+    except FileNotFoundError:
+        return False
+    return dest_stat.st_size == stat.st_size and abs(dest_stat.st_mtime_ns - stat.st_mtime_ns) <= MTIME_TOLERANCE_NS
+
+
+def _copy_file(src: Path, dest: Path):
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    part = dest.with_name(dest.name + PART_SUFFIX)
+    try:
+        shutil.copy2(src, part)
+        os.replace(part, dest)
+    except BaseException:
+        try:
+            os.remove(part)
+        except OSError:
+            pass
+        raise
+
+
+@instrumented("sync_dirs")
+def sync_dirs(pairs, ignore: tuple = ("*.tag",), max_workers: int = DEFAULT_MAX_WORKERS, manifest_dir: Path = None) -> CopyStats:
+    """Copies the new and changed files of folder trees.
+
+    Args:
+        pairs (list): (source folder, destination folder) of each tree.
+        ignore (tuple, optional): file name patterns that are not copied. Defaults to ("*.tag",).
+        max_workers (int, optional): number of parallel file copies. Defaults to 8.
+        manifest_dir (Path, optional): folder of the manifests. Defaults to the "copy_manifest" folder of the project cache folder.
+
+    Returns:
+        CopyStats: number of files and bytes copied, and the throughput.
+    """
+    stats = CopyStats()
+    lock = threading.Lock()
+    start = time.perf_counter()
+    if manifest_dir is None:
+        from .util_paths import Project_Paths
+        manifest_dir = Project_Paths().cache_path / MANIFEST_FOLDER
+    Path(manifest_dir).mkdir(parents=True, exist_ok=True)
+
+    def copy(job):
+        src, dest, stat, manifest, rel_path = job
+        try:
+            _copy_file(src, dest)
+        except OSError as e:
+            print("failed to copy:", src, e)
+            with lock:
+                stats.failed.append(src)
+            return
+        manifest.add(rel_path, stat.st_size, stat.st_mtime_ns)
+        with lock:
+            stats.files_copied += 1
+            stats.bytes_copied += stat.st_size
+
+    manifests = []
+    futures = []
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for src_dir, dest_dir in pairs:
+            src_dir, dest_dir = Path(src_dir), Path(dest_dir)
+            dest_dir.mkdir(parents=True, exist_ok=True)
+            manifest = _Manifest(dest_dir, manifest_dir)
+            manifests.append(manifest)
+            failed = []
+            # the copies start while the rest of the tree is scanned.
+            for rel_path, stat in _scan_files(src_dir, ignore, failed):
+                dest = dest_dir / rel_path
+                if _is_unchanged(dest, stat, manifest, rel_path):
+                    with lock:
+                        stats.files_skipped += 1
+                else:
+                    futures.append(pool.submit(copy, (src_dir / rel_path, dest, stat, manifest, rel_path)))
+            with lock:
+                stats.failed.extend(failed)
+        for future in futures:
+            future.result()
+    for manifest in manifests:
+        manifest.compact()
+    stats.seconds = time.perf_counter() - start
+    print(stats)
+    return stats
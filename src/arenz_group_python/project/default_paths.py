@@ -6,4 +6,7 @@ class PROJECT_FOLDERS(StrEnum):
     treated_data = "data_treated"
     scripts = "py_scripts"
     nb_models = "notebooks_models"
-    nb_exploration = "notebooks_exploration_cleaning" 
\ No newline at end of file
+    nb_exploration = "notebooks_exploration_cleaning" 
+
+CACHE_FOLDER = ".cache"
+"""Folder in the project root for cached data, e.g. parsed TDMS files. It can be deleted at any time."""
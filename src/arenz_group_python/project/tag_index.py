@@ -0,0 +1,166 @@
+"""
+Local index of the tag files of the experiment database on the server.
+
+The index is a SQLite file in the project cache folder with the modification time and the listing of each folder.
+When the index is refreshed, only the folders whose modification time changed are listed again, i.e. files or folders
+were added, removed or renamed in them. The other folders only cost a stat.
+
+Note that changing the content of a file does not change the modification time of its folder,
+i.e. the sizes in the file listing are those of when the folder was last listed.
+"""
+
+from fnmatch import fnmatch
+from pathlib import Path
+import hashlib
+import os
+import sqlite3
+import time
+
+from .util_paths import Project_Paths
+
+TAG_SUFFIX = ".tag"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dirs (path TEXT PRIMARY KEY, mtime_ns INTEGER);
+CREATE TABLE IF NOT EXISTS subdirs (parent TEXT, path TEXT);
+CREATE TABLE IF NOT EXISTS files (dir TEXT, name TEXT, size INTEGER, mtime_ns INTEGER);
+CREATE TABLE IF NOT EXISTS tags (dir TEXT, name TEXT);
+CREATE INDEX IF NOT EXISTS subdirs_parent ON subdirs (parent);
+CREATE INDEX IF NOT EXISTS files_dir ON files (dir);
+CREATE INDEX IF NOT EXISTS tags_dir ON tags (dir);
+CREATE INDEX IF NOT EXISTS tags_name ON tags (name);
+"""
+
+
+class TagIndex:
+    """Index of the tag files below a server folder.
+
+        index = TagIndex("X:/EXP_DB")
+        index.refresh()
+        dirs = index.find("my_project", dirID="GW")
+
+    The paths in the index are relative to the server folder, with "/" as separator. The server folder itself is "".
+    """
+
+    def __init__(self, server_dir: Path, index_file: Path = None):
+        """
+        Args:
+            server_dir (Path): path to the server data base.
+            index_file (Path, optional): SQLite file. Defaults to a file in the "tag_index" folder of the project cache folder.
+        """
+        self.server_dir = Path(server_dir)
+        if index_file is None:
+            name = hashlib.sha1(str(self.server_dir.absolute()).encode()).hexdigest()[:16]
+            index_file = Project_Paths().cache_path / "tag_index" / f"{name}.sqlite"
+        self.index_file = Path(index_file)
+        self.index_file.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.index_file)
+        self._db.executescript(SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    #####################################################################################################################
+    def _abs(self, rel: str) -> Path:
+        return self.server_dir / rel if rel else self.server_dir
+
+    def refresh(self):
+        """Updates the index. Only the folders whose modification time changed are listed again.
+
+        Returns:
+            tuple: number of folders that were listed, and number of folders in the index.
+        """
+        start = time.perf_counter()
+        listed = 0
+        total = 0
+        stack = [""]
+        with self._db:
+            while stack:
+                rel = stack.pop()
+                total += 1
+                try:
+                    mtime_ns = os.stat(self._abs(rel)).st_mtime_ns
+                except OSError as err:
+                    print(err)
+                    self._remove_tree(rel)
+                    continue
+                row = self._db.execute("SELECT mtime_ns FROM dirs WHERE path = ?", (rel,)).fetchone()
+                if row is not None and row[0] == mtime_ns:
+                    sub_dirs = [r[0] for r in self._db.execute("SELECT path FROM subdirs WHERE parent = ?", (rel,))]
+                else:
+                    sub_dirs = self._list_dir(rel, mtime_ns)
+                    listed += 1
+                stack.extend(sub_dirs)
+        print(f"Tag index: {listed} of {total} folders listed in {time.perf_counter() - start:.1f} s")
+        return listed, total
+
+    def _list_dir(self, rel: str, mtime_ns: int) -> list:
+        """Lists a folder and replaces its rows. Sub folders that were removed are removed from the index."""
+        sub_dirs, files, tags = [], [], []
+        prefix = f"{rel}/" if rel else ""
+        try:
+            with os.scandir(self._abs(rel)) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        sub_dirs.append(prefix + entry.name)
+                    else:
+                        if entry.name.endswith(TAG_SUFFIX):
+                            tags.append((rel, entry.name))
+                        # one entry that can not be read does not hide the rest of the folder.
+                        try:
+                            stat = entry.stat(follow_symlinks=False)
+                        except OSError as err:
+                            print(err)
+                            continue
+                        files.append((rel, entry.name, stat.st_size, stat.st_mtime_ns))
+        except OSError as err:
+            print(err)
+            return []
+        old_sub_dirs = {r[0] for r in self._db.execute("SELECT path FROM subdirs WHERE parent = ?", (rel,))}
+        for removed in old_sub_dirs.difference(sub_dirs):
+            self._remove_tree(removed)
+        self._db.execute("INSERT OR REPLACE INTO dirs VALUES (?, ?)", (rel, mtime_ns))
+        for table, column in (("subdirs", "parent"), ("files", "dir"), ("tags", "dir")):
+            self._db.execute(f"DELETE FROM {table} WHERE {column} = ?", (rel,))
+        self._db.executemany("INSERT INTO subdirs VALUES (?, ?)", [(rel, d) for d in sub_dirs])
+        self._db.executemany("INSERT INTO files VALUES (?, ?, ?, ?)", files)
+        self._db.executemany("INSERT INTO tags VALUES (?, ?)", tags)
+        return sub_dirs
+
+    def _remove_tree(self, rel: str):
+        # substr instead of LIKE, which would treat "_" and "%" in folder names as wildcards.
+        prefix = f"{rel}/"
+        for table, column in (("dirs", "path"), ("subdirs", "parent"), ("files", "dir"), ("tags", "dir")):
+            self._db.execute(f"DELETE FROM {table} WHERE {column} = ? OR substr({column}, 1, ?) = ?", (rel, len(prefix), prefix))
+        self._db.execute("DELETE FROM subdirs WHERE path = ?", (rel,))
+
+    #####################################################################################################################
+    def find(self, fileID: str, dirID: str = "") -> list[Path]:
+        """The folders with a tag file, "fileID.tag", whose name contains dirID. As find_dirs_with_tags, but from the index.
+
+        Args:
+            fileID (str): project name, i.e name of tag-file.
+            dirID (str, optional): string the folder name must contain. Defaults to "".
+
+        Returns:
+            list[Path]: absolute path to the directory with a matching tag.
+        """
+        rows = self._db.execute("SELECT DISTINCT dir FROM tags WHERE name = ?", (fileID + TAG_SUFFIX,))
+        dir_match = "*" + dirID + "*"
+        return sorted(self._abs(rel) for (rel,) in rows if fnmatch(self._abs(rel).name, dir_match))
+
+    def files(self, directory: Path) -> list:
+        """The file listing of a folder in the index.
+
+        Returns:
+            list: (name, size, mtime_ns) of each file.
+        """
+        rel = Path(directory).relative_to(self.server_dir).as_posix()
+        rel = "" if rel == "." else rel
+        return self._db.execute("SELECT name, size, mtime_ns FROM files WHERE dir = ? ORDER BY name", (rel,)).fetchall()
@@ -1,11 +1,16 @@
 
 
+from concurrent.futures import ThreadPoolExecutor
+from fnmatch import fnmatch
 from pathlib import Path
 import inspect
-import shutil
+import math
+import os
 
-from .default_paths import PROJECT_FOLDERS
+from .default_paths import PROJECT_FOLDERS, CACHE_FOLDER
 from .make_files import make_project_files,make_project_files_data
+from .copy_engine import sync_dirs, DEFAULT_MAX_WORKERS, MANIFEST_FOLDER
+from ..instrumentation import instrumented
 
 ############################################################
 ############################################################
@@ -27,30 +32,28 @@ class Project_Paths:
         
     #######################################################################
     def _find_dir(self,path_to_caller: Path, dir_name:str) -> Path:
-        
-        path_to_dir = Path()
-        if isinstance(path_to_caller, Path):  #make sure the path is a Path
-            p = path_to_caller
-        else:
-            p = Path(path_to_caller)
-
-        if (p / dir_name).exists():
-            path_to_dir = p / dir_name   
-        else:   
-            parents_dir = p.parents
-            
-            for x in parents_dir:
-                a = x / dir_name
-                #print(a.is_dir(),"\t\t",str(a) )
-                if a.is_dir():
-                    path_to_dir = a
-                    break
+        """Finds dir_name in path_to_caller or in one of its parents.
+
+        The result is cached per starting folder, i.e. the folders are only searched once per process.
+        Use Project_Paths.clear_cache() if the folders are moved or created.
+        """
+        p = Path.cwd() if path_to_caller is None else _to_Path(path_to_caller)
+        key = (str(p.absolute()), dir_name)
+        path_to_dir = _dir_cache.get(key)
+        if path_to_dir is None:
+            path_to_dir = _search_dir(p, dir_name)
+            _dir_cache[key] = path_to_dir
         if path_to_dir == Path():
             raise NotADirectoryError(f'\"{dir_name}\" could not be found as a branch of the folder tree form the notebook.\nPlease use standard project structure.')
         return path_to_dir      
 
+    @staticmethod
+    def clear_cache():
+        """Forgets the folders found by earlier calls, ex: after the project folders were moved or created."""
+        _dir_cache.clear()
+
     ######################################################################################
-    def _rawdata_path(self, path_to_caller : Path = Path.cwd() ) -> Path:
+    def _rawdata_path(self, path_to_caller : Path = None ) -> Path:
         """_summary_
 
         Args:
@@ -62,7 +65,7 @@ class Project_Paths:
         p = path_to_caller
         k = Path()
         #print(PROJECT_FOLDERS.rawdata)
-        if path_to_caller == Path(""):
+        if path_to_caller is None or path_to_caller == Path(""):
             p = Path.cwd()
         try:
             k = self._find_dir(p, str(PROJECT_FOLDERS.rawdata))
@@ -73,7 +76,7 @@ class Project_Paths:
         #return Path(".") 
     
     ###############################################################################################
-    def _treated_data_path(self, path_to_caller : Path = Path.cwd() ) -> Path:
+    def _treated_data_path(self, path_to_caller : Path = None ) -> Path:
         """_summary_
 
         Args:
@@ -82,6 +85,7 @@ class Project_Paths:
         Returns:
             Path: path to "treated_data" folder
         """
+        k = Path()
         try:
             k = self._find_dir(path_to_caller, str(PROJECT_FOLDERS.treated_data))
         except NotADirectoryError as err:
@@ -89,6 +93,20 @@ class Project_Paths:
         
         return k 
 
+    ###############################################################################################
+    def _cache_path(self, path_to_caller : Path = None ) -> Path:
+        """The cache folder is placed in the project root, i.e. next to the rawdata folder.
+        If there is no project structure, it is placed in the current working directory.
+
+        Returns:
+            Path: path to the cache folder. The folder might not exist yet.
+        """
+        try:
+            k = self._find_dir(path_to_caller, str(PROJECT_FOLDERS.rawdata)).parent
+        except NotADirectoryError:
+            k = Path.cwd() if path_to_caller is None else Path(path_to_caller)
+        return k / CACHE_FOLDER
+
     #################################################################################################
     def callers(self) -> str:
         caller_from = inspect.stack()[1]
@@ -121,13 +139,21 @@ class Project_Paths:
         """return to data path"""
         return self._treated_data_path()
     
+    @property 
+    def cache_path(self)  -> Path:
+        """return to cache path"""
+        return self._cache_path()
+    
     ##################################################################################################
-    def create_project_structure(self, project_path: Path =  Path.cwd() ):
+    def create_project_structure(self, project_path: Path = None ):
         """The fx creates a standard folder structure for projects.
 
         Args:
-            project_path (Path): Path to the base folder of the project. 
+            project_path (Path): Path to the base folder of the project. Defaults to the current working directory.
         """
+        if project_path is None:
+            project_path = Path.cwd()
+        Project_Paths.clear_cache()
         for folderPath in PROJECT_FOLDERS:
             try:
                 newFolder =  project_path / folderPath
@@ -141,73 +167,135 @@ class Project_Paths:
         make_project_files( project_path)
         make_project_files_data(project_path) 
         
-    def find_dirs_with_tags(self, server_dir: Path, dirID: str , fileID:str ): 
-        
-        return find_dirs_with_tags( server_dir, dirID , fileID )
+    def find_dirs_with_tags(self, server_dir: Path, dirID: str , fileID:str, dirID_depth:int = None, use_index:bool = False ): 
+        """See find_dirs_with_tags. With use_index, the tags are looked up in the local TagIndex of the server, 
+        which is refreshed first."""
+        if use_index:
+            from .tag_index import TagIndex
+            with TagIndex(server_dir) as index:
+                index.refresh()
+                return index.find(fileID, dirID)
+        return find_dirs_with_tags( server_dir, dirID , fileID, dirID_depth )
     
-    def copyDirs(self, server_dir: Path, dirID: str , fileID:str ):
+    @instrumented("Project_Paths.copyDirs")
+    def copyDirs(self, server_dir: Path, dirID: str , fileID:str, max_workers:int = DEFAULT_MAX_WORKERS, use_index:bool = False ):
         """Copy all files from each folder and subfolder containing a file with the ending .tag
         to the raw data folder while keeping the folder structure.
+
+        Only new and changed files are copied, several at a time, and an interrupted copy continues where it stopped.
+        See copy_engine.sync_dirs.
         
         Args:
             server_dir (Path): path to server data base
             dirID (str): string to select only certain folders containing the string. Makes the crawling faster.
             fileID (str): project name, i.e name of tag-file.
+            max_workers (int, optional): number of parallel file copies. Defaults to 8.
+            use_index (bool, optional): find the tags with the local TagIndex of the server, 
+                which only lists the folders that changed since the last sync. Defaults to False.
 
         Returns:
-            str: absolute path to the directory with a matching tag.
+            CopyStats: number of files and bytes copied, and the throughput.
         """
         server_dir = _to_Path(server_dir)
-        dirs = find_dirs_with_tags( server_dir, dirID , fileID )
+        dirs = self.find_dirs_with_tags( server_dir, dirID , fileID, use_index=use_index )
         if len(dirs) != 0:
             dest_dirs = create_Folder_Structure_For_RawData(server_dir, self.rawdata_path, dirs)
-            for i in range(len(dirs)):
-                try:
-                    ig = shutil.ignore_patterns("*.tag")
-                    shutil.copytree(dirs[i], dest_dirs[i], dirs_exist_ok=True, ignore = ig)      
-                except FileExistsError:
-                    print("failed to copy:", dirs[i])
-                    
+            return sync_dirs(zip(dirs, dest_dirs), ignore=("*.tag",), max_workers=max_workers,
+                             manifest_dir=self.cache_path / MANIFEST_FOLDER)
         return 
 
 #end of class ############################################################################   
 
+_dir_cache = {}
+"""Folders found by Project_Paths._find_dir: (starting folder, folder name) -> path, or Path() if not found."""
+
+
+def _search_dir(p: Path, dir_name:str) -> Path:
+    """Looks for dir_name in p and then in its parents. Returns Path() if it is not found."""
+    if (p / dir_name).exists():
+        return p / dir_name
+    for x in p.parents:
+        a = x / dir_name
+        #print(a.is_dir(),"\t\t",str(a) )
+        if a.is_dir():
+            return a
+    return Path()
+
+
 
 
 
 #########################################################################################     
-def find_dirs_with_tags( server_dir: Path, dirID: str , fileID:str ):
-    """_summary_
+@instrumented("find_dirs_with_tags")
+def find_dirs_with_tags( server_dir: Path, dirID: str , fileID:str, dirID_depth:int = None, max_workers:int = DEFAULT_MAX_WORKERS ):
+    """Finds the folders with a tag file, "fileID.tag", whose name contains dirID.
+
+    The top level folders of the server are crawled in parallel.
 
     Args:
         server_dir (Path): path to server data base
         dirID (str): string to select only certain folders containing the string.
         fileID (str): project name, i.e name of tag-file.
+        dirID_depth (int, optional): the folders with dirID in the name are at most this many levels below server_dir,
+            i.e. deeper folders are not crawled. Defaults to None, i.e. the whole tree is crawled.
+        max_workers (int, optional): number of folders crawled in parallel. Defaults to 8.
 
     Returns:
-        str: absolute path to the directory with a matching tag.
+        list[Path]: absolute path to the directory with a matching tag.
     """
-    dirs_with_tags =[]
+    server_dir = _to_Path(server_dir)
     fileID = fileID + ".tag"
     str_match = "*" + dirID + "*/" + fileID
     print("Pattern to look for:", str_match)
+    dirs_with_tags = set()
     if server_dir.is_dir() and server_dir.exists():
         print("Source Dir: ", server_dir)
-        for root,dirs,files in server_dir.walk(on_error=print):
-            for file in files: #look for tags
-                file_p = root / file
-                if file_p.match(str_match):
-                    #print(file_p,"found tag")
-                    if root not in dirs_with_tags:
-                        dirs_with_tags.append(root)
+        dir_match = "*" + dirID + "*"
+        max_depth = dirID_depth if dirID_depth is not None else math.inf
+        top_dirs = _scan_for_tags(server_dir, dir_match, fileID, dirs_with_tags)
+        if max_depth < 1:
+            top_dirs = []
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for found in pool.map(lambda d: _crawl_for_tags(d, 1, max_depth, dir_match, fileID), top_dirs):
+                dirs_with_tags.update(found)
     else:
         print("ERROR: The server path is not correct or server could not be found.")
         print("\t",server_dir)
+    dirs_with_tags = sorted(dirs_with_tags)
     for dir in dirs_with_tags:
         print("\t",dir)
     if len(dirs_with_tags)== 0:
         print("ERROR: no project folders were found.")
     return dirs_with_tags  
+
+
+def _scan_for_tags(directory: Path, dir_match: str, tag_name: str, found: set) -> list[Path]:
+    """Adds directory to found if it has a matching tag, and returns its sub folders."""
+    sub_dirs = []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    sub_dirs.append(Path(entry.path))
+                elif fnmatch(entry.name, tag_name) and fnmatch(directory.name, dir_match):
+                    found.add(directory)
+    except OSError as err:
+        print(err)
+    return sub_dirs
+
+
+def _crawl_for_tags(top: Path, depth: int, max_depth, dir_match: str, tag_name: str) -> set:
+    """Crawls the tree below top, which is depth levels below the server folder, with os.scandir."""
+    found = set()
+    stack = [(top, depth)]
+    while stack:
+        directory, d = stack.pop()
+        sub_dirs = _scan_for_tags(directory, dir_match, tag_name, found)
+        if d < max_depth:
+            stack.extend((sub_dir, d + 1) for sub_dir in sub_dirs)
+    return found
+
+
 ##########################################################################################################################################
 def create_Folder_Structure_For_RawData(server_dir: Path, dest: Path, dirs: list[Path]):
     """ 
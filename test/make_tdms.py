@@ -0,0 +1,27 @@
+from pathlib import Path
+import numpy as np
+from nptdms import TdmsWriter, RootObject, GroupObject, ChannelObject
+
+
+def synthesis_channels(n_samples: int = 3000, set_temperature: float = 150.0, dt: float = 1.0, seed: int = 0):
+    """Synthetic autoclave log: a linear heating ramp to the set temperature with noise and a few outliers."""
+    rng = np.random.default_rng(seed)
+    time = np.arange(n_samples) * dt
+    ramp = np.minimum(25.0 + time / 10.0, set_temperature)
+    temp_r = ramp + 273.15 + rng.normal(0, 0.2, n_samples)
+    temp_r[rng.integers(0, n_samples, max(1, n_samples // 500))] += 40.0
+    temp_hp = ramp + 293.15
+    pressure = 1.0e5 * (ramp - 25.0) / 25.0
+    rot = np.full(n_samples, 300.0)
+    return {"Time": time, "T_Reactor": temp_r, "T_HotPlate": temp_hp, "P_Reactor": pressure, "Rot": rot}
+
+
+def write_synthesis_tdms(path: Path, n_samples: int = 3000, name: str = "synthesis", segments: int = 1, **kwargs):
+    """Writes a synthetic autoclave log as a TDMS file, split in a number of segments."""
+    channels = synthesis_channels(n_samples, **kwargs)
+    bounds = np.linspace(0, n_samples, segments + 1).astype(int)
+    with TdmsWriter(path) as writer:
+        for first, last in zip(bounds[:-1], bounds[1:]):
+            writer.write_segment([RootObject(properties={"name": name}), GroupObject("Synthesis")]
+                                 + [ChannelObject("Synthesis", k, v[first:last]) for k, v in channels.items()])
+    return channels
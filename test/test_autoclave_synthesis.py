@@ -0,0 +1,156 @@
+
+import arenz_group_python
+from arenz_group_python import AutoClaveSynthesis, AC_synthesis_batch
+from arenz_group_python.data_treatment import TdmsChannelCache, AutoClaveMonitor
+from arenz_group_python.data_treatment.util_filter import clean_outliers
+from arenz_group_python.data_treatment import tdms_cache
+from unittest import mock
+from make_tdms import write_synthesis_tdms, synthesis_channels
+from nptdms import TdmsWriter, ChannelObject
+import numpy as np
+import tempfile
+import subprocess
+import sys
+import os
+from pathlib import Path
+import unittest   # The test framework
+
+
+class Test_AutoClaveSynthesis(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.path = Path(cls.tmp.name) / "Synthesis_1.tdms"
+        cls.channels = write_synthesis_tdms(cls.path, 3000, name="S1", segments=3)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def test_load(self):
+        ac = AutoClaveSynthesis(self.path)
+        self.assertEqual(str(ac), "S1")
+        np.testing.assert_allclose(ac.Temp_R, self.channels["T_Reactor"])
+        data, q, unit = ac.get_channel("T_Reactor_in_C")
+        self.assertEqual(unit, "°C")
+        np.testing.assert_allclose(data, self.channels["T_Reactor"] - 273.15)
+
+    def test_lazy(self):
+        with AutoClaveSynthesis(self.path, lazy=True) as ac:
+            self.assertEqual(len(ac._data), 0)
+            data, q, unit = ac.get_channel("P_Reactor_in_bar")
+            self.assertEqual(list(ac._data), ["Overpressure"])
+            np.testing.assert_allclose(data, self.channels["P_Reactor"] / 1e5)
+            chunks = [c for c, q, u in ac.read_chunks("Time_in_min", 700)]
+            self.assertEqual(len(chunks), 5)
+            np.testing.assert_allclose(np.concatenate(chunks), self.channels["Time"] / 60)
+        np.testing.assert_allclose(ac.get_channel("P_Reactor_in_bar")[0], self.channels["P_Reactor"] / 1e5)
+        with self.assertRaises(ValueError):
+            ac.Temp_R
+
+    def test_lazy_missing_channel(self):
+        path = Path(self.tmp.name) / "no_rot.tdms"
+        channels = synthesis_channels(100)
+        with TdmsWriter(path) as writer:
+            writer.write_segment([ChannelObject("Synthesis", k, v) for k, v in channels.items() if k != "Rot"])
+        ac = AutoClaveSynthesis(path, lazy=True)
+        self.assertIsNone(ac._tdms_file)
+
+    def test_cache(self):
+        cache = TdmsChannelCache(Path(self.tmp.name) / "cache")
+        ac = AutoClaveSynthesis(self.path, cache=cache)
+        self.assertIsNotNone(cache.load(self.path))
+        ac2 = AutoClaveSynthesis(self.path, cache=cache)
+        self.assertIsInstance(ac2.Temp_R, np.memmap)
+        self.assertEqual(str(ac2), "S1")
+        np.testing.assert_allclose(ac2.Temp_R, ac.Temp_R)
+        os.utime(self.path, ns=(0, 0))
+        self.assertIsNone(cache.load(self.path))
+        AutoClaveSynthesis(self.path, cache=cache)
+        self.assertEqual(len(cache._entries()), 1)
+        cache.max_size = 0
+        cache._evict()
+        self.assertEqual(cache.size(), 0)
+
+    def test_cache_entry_removed_while_loading(self):
+        cache = TdmsChannelCache(Path(self.tmp.name) / "cache_evicted")
+        AutoClaveSynthesis(self.path, cache=cache)
+        np_load = np.load
+
+        def evicted_load(file, *args, **kwargs):
+            cache.clear()
+            return np_load(file, *args, **kwargs)
+
+        with mock.patch.object(tdms_cache.np, "load", evicted_load):
+            self.assertIsNone(cache.load(self.path))
+        AutoClaveSynthesis(self.path, cache=cache)
+        with mock.patch.object(tdms_cache.os, "utime", side_effect=PermissionError("read-only")):
+            ac = AutoClaveSynthesis(self.path, cache=cache)
+        self.assertIsInstance(ac.Temp_R, np.memmap)
+
+    def test_monitor(self):
+        path = Path(self.tmp.name) / "live" / "Synthesis_live.tdms"
+        path.parent.mkdir()
+        channels = synthesis_channels(3000)
+        monitor = AutoClaveMonitor(path, set_temperature=150.0)
+        for first in range(0, 3000, 1000):
+            with TdmsWriter(path, mode="a") as writer:
+                writer.write_segment([ChannelObject("Synthesis", k, v[first:first + 1000]) for k, v in channels.items()])
+            metrics = monitor.update()
+            self.assertEqual(monitor.samples, first + 1000)
+            self.assertAlmostEqual(metrics["Duration"].value, channels["Time"][first + 999] / 60)
+        self.assertEqual(monitor.update()["Duration"].value, metrics["Duration"].value)
+        self.assertEqual(monitor.samples, 3000)
+        self.assertAlmostEqual(metrics["Time_to_Set_Temperature"].value, 20.8, delta=0.5)
+        self.assertAlmostEqual(metrics["Max_Overpressure"].value, 5.0)
+        self.assertEqual(metrics["Rotation_Rate"].value, 300.0)
+
+    def test_monitor_matches_whole_file(self):
+        path = Path(self.tmp.name) / "live" / "Synthesis_batches.tdms"
+        path.parent.mkdir(exist_ok=True)
+        channels = synthesis_channels(3000)
+        # an outlier close to the end of a batch.
+        channels["T_Reactor"][1495] += 40.0
+        monitor = AutoClaveMonitor(path, set_temperature=150.0)
+        bounds = [0, 7, 500, 1003, 1500, 1504, 2300, 3000]
+        for first, last in zip(bounds[:-1], bounds[1:]):
+            with TdmsWriter(path, mode="a") as writer:
+                writer.write_segment([ChannelObject("Synthesis", k, v[first:last]) for k, v in channels.items()])
+            metrics = monitor.update()
+            cleaned = clean_outliers(channels["T_Reactor"][:last] - 273.15, 20, 1)
+            time_min = channels["Time"][:last] / 60
+            self.assertAlmostEqual(metrics["Max_Temperature_of_Reactor"].value, cleaned.max())
+            above = cleaned >= 150.0
+            expected = time_min[np.argmax(above)] if above.any() else time_min[-1]
+            self.assertAlmostEqual(metrics["Time_to_Set_Temperature"].value, expected)
+        whole_file = AutoClaveSynthesis(path).AC_synthesis_metrics()
+        for key in ("Max_Overpressure", "Rotation_Rate", "Duration"):
+            self.assertAlmostEqual(metrics[key].value, whole_file[key].value, places=1)
+
+    def test_parameters(self):
+        parameters = AutoClaveSynthesis(self.path).get_parameters()
+        self.assertEqual(parameters["Set Temperature [°C]"], 150.0)
+        self.assertAlmostEqual(parameters["Time to Set Temperature [min]"], 20.8, delta=0.5)
+        self.assertEqual(parameters["Rotation Rate [rpm]"], 300.0)
+
+    def test_metrics(self):
+        metrics = AutoClaveSynthesis(self.path).AC_synthesis_metrics()
+        self.assertEqual(metrics["Set_Temperature"].value, 150.0)
+        self.assertEqual(metrics["Set_Temperature"].unit, "°C")
+        self.assertEqual(metrics["Heating_Rate"].unit, "°C min^-1")
+        code = ("import sys; from arenz_group_python import AutoClaveSynthesis; "
+                f"AutoClaveSynthesis(r'{self.path}').AC_synthesis_metrics(); "
+                "print('matplotlib' in sys.modules)")
+        env = dict(os.environ, PYTHONPATH=str(Path(arenz_group_python.__file__).parents[1]))
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env)
+        self.assertEqual(out.stdout.strip(), "False")
+
+    def test_batch(self):
+        write_synthesis_tdms(Path(self.tmp.name) / "Synthesis_2.tdms", 2000, name="S2", set_temperature=100.0)
+        df = AC_synthesis_batch(self.tmp.name, max_workers=2)
+        self.assertEqual(list(df["name"]), ["S1", "S2"])
+        self.assertEqual(list(df["Set Temperature [°C]"]), [150.0, 100.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,231 @@
+
+from arenz_group_python import save_dict_to_tableFile
+from arenz_group_python.file import save_dict_to_parquetFile, save_dicts_to_parquetFile, load_parquetFile
+from arenz_group_python.file import save_dict_to_file, load_dict_from_file, load_dicts_from_files, TableStore, compact_tableFile, save_key_values, save_key_values_many, load_key_values, compact_key_values
+from arenz_group_python.file.file_dict import open_dict_from_tablefile, typed_path, split_quantity_columns, string_to_dict
+from arenz_group_python.file.table_store import journal_path, shard_paths
+from concurrent.futures import ThreadPoolExecutor
+import importlib.util
+import numpy as np
+import os
+import pandas as pd
+import tempfile
+import threading
+from pathlib import Path
+from arenz_group_python import Quantity_Value_Unit as Q
+import unittest   # The test framework
+
+
+class Test_TableStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "extracted_values.csv"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_save_dict_to_tableFile(self):
+        save_dict_to_tableFile(self.path, "s1", {"a": 1, "b": "x"})
+        save_dict_to_tableFile(self.path, "s2", {"a": 2})
+        save_dict_to_tableFile(self.path, "s1", {"a": 3, "c": 2.5})
+        df = TableStore(self.path).to_DataFrame()
+        self.assertEqual(list(df.columns), ["name", "a", "b", "c"])
+        self.assertEqual(list(df["name"]), ["s1", "s2"])
+        self.assertEqual(list(df["a"]), [3, 2])
+
+    def test_upsert_many(self):
+        with TableStore(self.path) as table:
+            table.upsert_many({f"sample {i}": {"i": i, "sq": i * i} for i in range(1000)})
+            table.upsert_many([("sample 3", {"i": -3})])
+        table = TableStore(self.path)
+        self.assertEqual(len(table), 1000)
+        self.assertEqual(table.rows["sample 3"], {"i": "-3", "sq": ""})
+        self.assertEqual(table.rows["sample 999"]["sq"], "998001")
+
+    def test_journal(self):
+        save_dict_to_tableFile(self.path, "s1", {"a": 1})
+        save_dict_to_tableFile(self.path, "s2", {"a": 2}, journal=True)
+        save_dict_to_tableFile(self.path, "s1", {"a": 3}, journal=True)
+        self.assertTrue(journal_path(self.path).exists())
+        df = open_dict_from_tablefile(self.path)
+        self.assertEqual(list(df["a"]), [3, 2])
+        # a normal save folds the journal into the file.
+        save_dict_to_tableFile(self.path, "s3", {"a": 4})
+        self.assertFalse(journal_path(self.path).exists())
+        save_dict_to_tableFile(self.path, "s3", {"a": 5}, journal=True)
+        compact_tableFile(self.path)
+        self.assertFalse(journal_path(self.path).exists())
+        self.assertEqual(TableStore(self.path).rows["s3"]["a"], "5")
+
+    def test_shards_and_concurrent_writers(self):
+        save_dict_to_tableFile(self.path, "s0", {"a": 0})
+        save_dict_to_tableFile(self.path, "s1", {"a": 1}, shard="worker1")
+        save_dict_to_tableFile(self.path, "s2", {"a": 2}, shard="worker2")
+        self.assertEqual(len(shard_paths(self.path)), 2)
+        df = open_dict_from_tablefile(self.path)
+        self.assertEqual(list(df["name"]), ["s0", "s1", "s2"])
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda i: save_dict_to_tableFile(self.path, f"t{i}", {"a": i}), range(20)))
+        self.assertEqual(len(TableStore(self.path)), 23)
+        compact_tableFile(self.path)
+        self.assertEqual(shard_paths(self.path), [])
+        self.assertEqual(len(TableStore(self.path)), 23)
+
+    def test_changed_shard_is_not_removed(self):
+        save_dict_to_tableFile(self.path, "s1", {"a": 1}, shard="worker1")
+        store = TableStore(self.path)
+        # same size, and the same modification time on a file system with a coarse resolution.
+        mtime = shard_paths(self.path)[0].stat().st_mtime_ns
+        save_dict_to_tableFile(self.path, "s1", {"a": 2}, shard="worker1")
+        os.utime(shard_paths(self.path)[0], ns=(mtime, mtime))
+        store.flush()
+        self.assertEqual(len(shard_paths(self.path)), 1)
+        self.assertEqual(TableStore(self.path).rows["s1"]["a"], "2")
+
+    def test_journal_compacted_by_another_writer(self):
+        save_dict_to_tableFile(self.path, "s1", {"a": 1}, journal=True)
+        store = TableStore(self.path)
+        # another writer folds the journal into the file, then appends a new record.
+        compact_tableFile(self.path)
+        save_dict_to_tableFile(self.path, "s2", {"a": 2}, journal=True)
+        store.flush()
+        self.assertTrue(journal_path(self.path).exists())
+        self.assertEqual(TableStore(self.path).rows["s2"]["a"], "2")
+
+    def test_lock_is_released_if_load_fails(self):
+        journal_path(self.path).write_text("not json\n")
+        try:
+            TableStore(self.path, lock=True)
+            self.fail("the journal was read")
+        except ValueError as e:
+            error = e  # keeps the store alive through the traceback.
+        journal_path(self.path).unlink()
+        # the lock is reentrant, i.e. only another thread would wait for it.
+        writer = threading.Thread(target=save_dict_to_tableFile, args=(self.path, "s1", {"a": 1}), daemon=True)
+        writer.start()
+        writer.join(timeout=10)
+        self.assertFalse(writer.is_alive())
+        del error
+
+    def test_open_dict_from_tablefile_quantities(self):
+        save_dict_to_tableFile(self.path, "s1", {"T": "150 °C", "m": "1.5 g", "note": "dry"})
+        save_dict_to_tableFile(self.path, "s2", {"T": "1.75e2 °C", "m": "20 mg", "note": "wet"})
+        df = open_dict_from_tablefile(self.path)
+        self.assertEqual(list(df["T"]), [150.0, 175.0])
+        self.assertEqual(df.attrs["units"], {"T": "°C"})
+        self.assertEqual([str(q._unit) for q in df["m"]], ["g", "mg"])
+        self.assertEqual(df["m"][1].value, 20.0)
+        self.assertEqual(list(df["note"]), ["dry", "wet"])
+
+    def test_split_quantity_columns_whitespace(self):
+        df = pd.DataFrame({"name": ["s1", "s2", "s3"], "c": ["1.5\tmol /L", "2\u00a0mol /L", " 3  mol /L "]})
+        df = split_quantity_columns(df)
+        self.assertEqual(list(df["c"]), [1.5, 2.0, 3.0])
+        self.assertEqual(df.attrs["units"], {"c": "mol /L"})
+
+    def test_split_quantity_columns_bad_unit(self):
+        df = pd.DataFrame({"name": ["s1", "s2"], "mixed": ["3 a^b", "4 m"], "same": ["3 a^b", "4 a^b"]})
+        df = split_quantity_columns(df)
+        self.assertEqual(df["mixed"][0], "3 a^b")
+        self.assertEqual((df["mixed"][1].value, df["mixed"][1].unit), (4.0, "m"))
+        self.assertEqual(list(df["same"]), ["3 a^b", "4 a^b"])
+        self.assertEqual(df.attrs["units"], {})
+
+    def test_typed_dict_file(self):
+        path = Path(self.tmp.name) / "parameters.txt"
+        kw = {"n": 5, "x": 5.0, "flag": True, "d": Q(10.5, "nm"), "text": "10 nm"}
+        save_dict_to_file(path, kw)
+        text = load_dict_from_file(path)
+        self.assertIsInstance(text["x"], float)
+        self.assertIsInstance(text["text"], Q)  # guessed from the text
+        save_dict_to_file(path, kw, typed=True)
+        self.assertTrue(typed_path(path).exists())
+        typed = load_dicts_from_files([path], as_dict=True)[path]
+        self.assertEqual(typed["n"], 5)
+        self.assertIsInstance(typed["x"], float)
+        self.assertIs(typed["flag"], True)
+        self.assertEqual((typed["d"].value, str(typed["d"]._unit)), (10.5, "nm"))
+        self.assertEqual(typed["text"], "10 nm")
+
+    def test_string_to_dict_bad_unit(self):
+        self.assertEqual(string_to_dict("x = 5 m^x", {}), {"x": "5 m^x"})
+        self.assertEqual(string_to_dict("x = 1e3 a^", {}), {"x": "1e3 a^"})
+        self.assertEqual(string_to_dict("x = 5 m^2", {})["x"].unit, "m^2")
+
+    def test_typed_dict_file_numpy_scalars(self):
+        path = Path(self.tmp.name) / "parameters.txt"
+        kw = {"n": np.int64(5), "m": np.int32(-3), "flag": np.bool_(False), "x": np.float32(0.5), "y": np.float64(np.nan)}
+        save_dict_to_file(path, kw, typed=True)
+        typed = load_dict_from_file(path)
+        self.assertEqual((typed["n"], typed["m"], typed["x"]), (5, -3, 0.5))
+        self.assertIs(type(typed["n"]), int)
+        self.assertIs(typed["flag"], False)
+        self.assertTrue(np.isnan(typed["y"]))
+        typed_path(path).unlink()
+        text = load_dict_from_file(path)
+        self.assertEqual({k: text[k] for k in ("n", "m", "x")}, {k: typed[k] for k in ("n", "m", "x")})
+
+    def test_load_dicts_from_files(self):
+        for i in range(5):
+            kw = {"run": i, "T": Q(150 + i, "°C"), "mass": f"{i} mg" if i % 2 else f"{i} g", "operator": "ab"}
+            save_dict_to_file(Path(self.tmp.name) / f"run{i}.txt", kw, typed=(i == 4))
+        df = load_dicts_from_files(str(Path(self.tmp.name) / "run*.txt"), max_workers=2)
+        self.assertEqual(len(df), 5)
+        self.assertEqual(list(df["run"]), [0, 1, 2, 3, 4])
+        self.assertEqual(list(df["T"]), [150.0, 151.0, 152.0, 153.0, 154.0])
+        self.assertEqual(df.attrs["units"], {"T": "°C"})
+        self.assertEqual([str(q._unit) for q in df["mass"]], ["g", "mg", "g", "mg", "g"])
+        self.assertEqual(list(df["operator"]), ["ab"] * 5)
+
+    def test_load_dicts_from_files_typed_quantities(self):
+        for i in range(3):
+            kw = {"ratio": Q(0.123456789 + i, ""), "mass": Q(1.5, "g") if i else Q(2.0, "mg")}
+            save_dict_to_file(Path(self.tmp.name) / f"run{i}.txt", kw, typed=True)
+        df = load_dicts_from_files(str(Path(self.tmp.name) / "run*.txt"))
+        self.assertEqual(list(df["ratio"]), [0.123456789, 1.123456789, 2.123456789])
+        self.assertEqual(df.attrs["units"], {"ratio": ""})
+        self.assertEqual([(q.value, str(q._unit)) for q in df["mass"]], [(2.0, "mg"), (1.5, "g"), (1.5, "g")])
+
+    @unittest.skipIf(importlib.util.find_spec("pyarrow") is None, "needs pyarrow")
+    def test_parquet(self):
+        path = Path(self.tmp.name) / "extracted_values.parquet"
+        save_dicts_to_parquetFile(path, {})
+        self.assertFalse(path.exists())
+        save_dicts_to_parquetFile(path, {f"s{i}": {"T": Q(150 + i, "°C"), "n": i, "note": "x"} for i in range(10)})
+        save_dict_to_parquetFile(path, "s3", {"T": Q(500, "K"), "n": 30, "extra": 1.5})
+        df = load_parquetFile(path)
+        self.assertEqual(len(df), 10)
+        self.assertEqual(df.attrs["units"], {"T": "°C"})
+        row = df[df["name"] == "s3"].iloc[0]
+        self.assertAlmostEqual(row["T"], 500 - 273.15)
+        self.assertEqual(row["n"], 30)
+        df = load_parquetFile(path, columns=["n"], names=["s1", "s2"])
+        self.assertEqual(list(df.columns), ["name", "n"])
+        self.assertEqual(sorted(df["name"]), ["s1", "s2"])
+        save_dicts_to_parquetFile(path, {})
+        self.assertEqual(len(load_parquetFile(path)), 10)
+
+    def test_key_values_journal(self):
+        save_key_values(self.path, "s1", [1, 2], journal=True)
+        save_key_values(self.path, "s1", [3, 4], journal=True)
+        save_key_values(self.path, "s2", [5], journal=True)
+        self.assertEqual(load_key_values(self.path), {"s1": ["3", "4"], "s2": ["5"]})
+        compact_key_values(self.path)
+        self.assertFalse(journal_path(self.path).exists())
+        self.assertEqual(load_key_values(self.path), {"s1": ["3", "4"], "s2": ["5"]})
+        save_key_values(self.path, "s2", [6], journal=True)
+        save_key_values(self.path, "s1", [7])
+        self.assertFalse(journal_path(self.path).exists())
+        self.assertEqual(load_key_values(self.path), {"s1": ["7"], "s2": ["6"]})
+
+    def test_key_values_exact_match(self):
+        path = Path(self.tmp.name) / "new" / "key_values.csv"
+        save_key_values(path, "s1", [1])
+        save_key_values_many(path, {"s1.5": [2], "s1(a)": [3], "s11": [4]})
+        save_key_values(path, "s1", [5])
+        save_key_values(path, "s1(a)", [6])
+        self.assertEqual(load_key_values(path), {"s1": ["5"], "s1.5": ["2"], "s1(a)": ["6"], "s11": ["4"]})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,30 @@
+import subprocess
+import sys
+import unittest   # The test framework
+
+HEAVY_MODULES = ("pandas", "nptdms", "scipy", "matplotlib")
+
+
+def imported_modules(code: str) -> list:
+    """Runs code in a new interpreter and returns the heavy modules it imported."""
+    check = f"{code}\nimport sys\nprint(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", check], capture_output=True, text=True, check=True)
+    return [m for m in result.stdout.strip().split(",") if m]
+
+
+class Test_LazyImports(unittest.TestCase):
+    def test_import_package(self):
+        self.assertEqual(imported_modules("import arenz_group_python"), [])
+
+    def test_import_light_names(self):
+        self.assertEqual(imported_modules("from arenz_group_python import Project_Paths"), [])
+        self.assertEqual(imported_modules("from arenz_group_python import Quantity_Value_Unit, QuantityArray"), [])
+        self.assertEqual(imported_modules("from arenz_group_python.data_treatment import convert"), [])
+
+    def test_import_heavy_names(self):
+        self.assertIn("nptdms", imported_modules("from arenz_group_python import AutoClaveSynthesis"))
+        self.assertIn("pandas", imported_modules("import arenz_group_python as a; a.TableStore"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+from arenz_group_python import AutoClaveSynthesis, save_dict_to_tableFile, instrumentation
+from make_tdms import write_synthesis_tdms
+from concurrent.futures import ThreadPoolExecutor
+import json
+import tempfile
+import tracemalloc
+from pathlib import Path
+import unittest   # The test framework
+
+
+class Test_Instrumentation(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "synthesis.tdms"
+        write_synthesis_tdms(self.path, 3000)
+        instrumentation.clear()
+
+    def tearDown(self):
+        instrumentation.disable()
+        instrumentation.clear()
+        self.tmp.cleanup()
+
+    def test_disabled(self):
+        AutoClaveSynthesis(self.path).AC_synthesis_metrics()
+        self.assertEqual(instrumentation.records(), [])
+
+    def test_stages(self):
+        instrumentation.enable(memory=True)
+        AutoClaveSynthesis(self.path).AC_synthesis_metrics()
+        save_dict_to_tableFile(Path(self.tmp.name) / "values.csv", "s1", {"a": 1})
+        summary = instrumentation.summary()
+        for stage in ("AutoClaveSynthesis.load", "AutoClaveSynthesis.AC_synthesis_table", "AutoClaveSynthesis.clean_outliers",
+                      "AutoClaveSynthesis.smoothing", "AutoClaveSynthesis.threshold_search",
+                      "save_dict_to_tableFile", "TableStore.flush"):
+            self.assertEqual(summary[stage]["calls"], 1)
+        parents = {r["stage"]: r["parent"] for r in instrumentation.records()}
+        self.assertEqual(parents["AutoClaveSynthesis.clean_outliers"], "AutoClaveSynthesis.AC_synthesis_table")
+        self.assertEqual(parents["TableStore.flush"], "save_dict_to_tableFile")
+        load = summary["AutoClaveSynthesis.load"]
+        self.assertGreater(load["wall_s"], 0)
+        self.assertGreater(load["peak_bytes"], 5 * 3000 * 8)  # the channels
+        lines = instrumentation.to_json_lines().splitlines()
+        self.assertEqual([json.loads(line)["stage"] for line in lines], [r["stage"] for r in instrumentation.records()])
+
+    def test_stage_info(self):
+        instrumentation.enable()
+        with instrumentation.stage("outer", path="a"):
+            with instrumentation.stage("inner"):
+                pass
+        self.assertEqual([(r["stage"], r["parent"]) for r in instrumentation.records()], [("inner", "outer"), ("outer", None)])
+        self.assertEqual(instrumentation.records()[1]["path"], "a")
+        self.assertIsNone(instrumentation.records()[1]["peak_bytes"])
+
+    def test_tracing_of_the_caller_is_kept(self):
+        tracemalloc.start()
+        try:
+            instrumentation.enable(memory=True)
+            instrumentation.disable()
+            self.assertTrue(tracemalloc.is_tracing())
+        finally:
+            tracemalloc.stop()
+        instrumentation.enable(memory=True)
+        instrumentation.disable()
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_memory_of_concurrent_stages(self):
+        def work(i):
+            with instrumentation.stage("worker"):
+                return bytearray(1000)
+
+        instrumentation.enable(memory=True)
+        with instrumentation.stage("outer"):
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                list(pool.map(work, range(8)))
+            data = bytearray(10**6)
+        del data
+        peaks = {r["stage"]: r["peak_bytes"] for r in instrumentation.records()}
+        self.assertIsNone(peaks["worker"])
+        self.assertGreaterEqual(peaks["outer"], 10**6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,169 @@
+from arenz_group_python.project import copy_engine
+from arenz_group_python.project.copy_engine import sync_dirs, manifest_path
+from arenz_group_python.project.util_paths import find_dirs_with_tags
+from arenz_group_python.project import TagIndex, Project_Paths
+import shutil
+import os
+import tempfile
+from pathlib import Path
+from unittest import mock
+import unittest   # The test framework
+
+
+def make_tree(root: Path, files: dict):
+    for rel_path, text in files.items():
+        p = root / rel_path
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_text(text)
+
+
+class Test_CopyEngine(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_sync_dirs(self):
+        src, dest = self.root / "server" / "exp1", self.root / "data_raw" / "exp1"
+        make_tree(src, {"a.tdms": "a" * 100, "sub/b.txt": "b", "project.tag": ""})
+        manifests = self.root / ".cache" / "copy_manifest"
+        stats = sync_dirs([(src, dest)], max_workers=4, manifest_dir=manifests)
+        self.assertEqual((stats.files_copied, stats.files_skipped, stats.bytes_copied), (2, 0, 101))
+        self.assertEqual((dest / "sub" / "b.txt").read_text(), "b")
+        self.assertFalse((dest / "project.tag").exists())
+        self.assertTrue(manifest_path(dest, manifests).exists())
+        self.assertEqual(sorted(p.name for p in dest.iterdir()), ["a.tdms", "sub"])
+
+        (src / "sub" / "b.txt").write_text("changed")
+        os.utime(src / "sub" / "b.txt", ns=(0, 10**9))
+        make_tree(src, {"c.txt": "c"})
+        stats = sync_dirs([(src, dest)], manifest_dir=manifests)
+        self.assertEqual((stats.files_copied, stats.files_skipped), (2, 1))
+        self.assertEqual((dest / "sub" / "b.txt").read_text(), "changed")
+
+    def test_sync_dirs_failures(self):
+        src, dest = self.root / "server" / "exp1", self.root / "data_raw" / "exp1"
+        make_tree(src, {"a.txt": "a", "locked/b.txt": "b", "open/c.txt": "c"})
+        scandir = os.scandir
+
+        def failing_scandir(path):
+            if Path(path).name == "locked":
+                raise PermissionError("denied")
+            return scandir(path)
+
+        def failing_copy(src_file, dest_file):
+            Path(dest_file).write_text("partial")
+            raise OSError("disconnected")
+
+        with mock.patch.object(copy_engine.os, "scandir", failing_scandir):
+            stats = sync_dirs([(src, dest)], manifest_dir=self.root / "manifests")
+        self.assertEqual(stats.files_copied, 2)
+        self.assertEqual(stats.failed, [src / "locked"])
+        self.assertEqual((dest / "open" / "c.txt").read_text(), "c")
+
+        (src / "a.txt").write_text("changed")
+        with mock.patch.object(copy_engine.shutil, "copy2", failing_copy):
+            stats = sync_dirs([(src, dest)], manifest_dir=self.root / "manifests")
+        self.assertEqual(sorted(stats.failed), [src / "a.txt", src / "locked" / "b.txt"])
+        self.assertEqual((dest / "a.txt").read_text(), "a")
+
+    def test_sync_dirs_folder_links(self):
+        src, dest = self.root / "server" / "exp1", self.root / "data_raw" / "exp1"
+        make_tree(src, {"a.txt": "a"})
+        make_tree(self.root / "server" / "shared", {"b.txt": "b"})
+        os.symlink(self.root / "server" / "shared", src / "linked")
+        os.symlink(src, src / "loop")
+        stats = sync_dirs([(src, dest)], manifest_dir=self.root / "manifests")
+        self.assertEqual(stats.failed, [])
+        self.assertEqual(stats.files_copied, 2)
+        self.assertEqual((dest / "linked" / "b.txt").read_text(), "b")
+        self.assertFalse((dest / "loop").exists())
+        self.assertEqual(list(dest.rglob("*.part")), [])
+
+
+class Test_FindDirsWithTags(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        make_tree(self.root, {
+            "2024/GW_exp1/proj.tag": "",
+            "2024/GW_exp1/sub/proj.tag": "",  # the folder name does not contain dirID
+            "2024/deep/x/y/GW_exp2/proj.tag": "",
+            "2024/GW_exp3/other.tag": "",
+            "2025/AB_exp4/proj.tag": "",
+        })
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_find_dirs_with_tags(self):
+        dirs = find_dirs_with_tags(self.root, "GW", "proj")
+        self.assertEqual(dirs, [self.root / "2024/GW_exp1", self.root / "2024/deep/x/y/GW_exp2"])
+        dirs = find_dirs_with_tags(self.root, "GW", "proj", dirID_depth=2)
+        self.assertEqual(dirs, [self.root / "2024/GW_exp1"])
+        self.assertEqual(find_dirs_with_tags(self.root, "", "proj", dirID_depth=2), 
+                         [self.root / "2024/GW_exp1", self.root / "2025/AB_exp4"])
+
+    def test_tag_index(self):
+        index_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(index_dir.cleanup)
+        with TagIndex(self.root, index_file=Path(index_dir.name) / "index.sqlite") as index:
+            self.assertEqual(index.refresh()[0], 11)
+            self.assertEqual(index.find("proj", "GW"), find_dirs_with_tags(self.root, "GW", "proj"))
+            self.assertEqual(index.refresh()[0], 0)
+            make_tree(self.root, {"2025/GW_exp5/proj.tag": ""})
+            shutil.rmtree(self.root / "2024" / "deep")
+            self.assertEqual(index.refresh()[0], 3)  # the root, "2024" and "2025"
+            self.assertEqual(index.find("proj", "GW"), [self.root / "2024/GW_exp1", self.root / "2025/GW_exp5"])
+            self.assertEqual([f[0] for f in index.files(self.root / "2025/GW_exp5")], ["proj.tag"])
+
+    def test_tag_index_broken_entries(self):
+        os.symlink(self.root / "missing", self.root / "2024" / "dangling")
+        index_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(index_dir.cleanup)
+        scandir = os.scandir
+
+        def scandir_with_unreadable_entry(path):
+            entries = list(scandir(path))
+            if Path(path).name == "GW_exp3":
+                broken = mock.Mock(wraps=entries[0])
+                broken.name = "broken.txt"
+                broken.is_dir.return_value = False
+                broken.stat.side_effect = PermissionError("denied")
+                entries.append(broken)
+            return mock.MagicMock(__enter__=mock.Mock(return_value=entries))
+
+        with TagIndex(self.root, index_file=Path(index_dir.name) / "index.sqlite") as index:
+            with mock.patch("arenz_group_python.project.tag_index.os.scandir", scandir_with_unreadable_entry):
+                index.refresh()
+            self.assertEqual(index.find("proj", "GW"), find_dirs_with_tags(self.root, "GW", "proj"))
+            self.assertIn("dangling", [f[0] for f in index.files(self.root / "2024")])
+            self.assertEqual([f[0] for f in index.files(self.root / "2024/GW_exp3")], ["other.tag"])
+
+
+class Test_Project_Paths(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        Project_Paths.clear_cache()
+
+    def tearDown(self):
+        Project_Paths.clear_cache()
+        self.tmp.cleanup()
+
+    def test_find_dir_is_cached(self):
+        start = self.root / "notebooks" / "sub"
+        start.mkdir(parents=True)
+        (self.root / "data_raw").mkdir()
+        paths = Project_Paths()
+        self.assertEqual(paths._rawdata_path(start), self.root / "data_raw")
+        (self.root / "data_raw").rename(self.root / "moved")
+        self.assertEqual(paths._rawdata_path(start), self.root / "data_raw")
+        Project_Paths.clear_cache()
+        self.assertEqual(paths._rawdata_path(start), Path())
+
+
+if __name__ == '__main__':
+    unittest.main()
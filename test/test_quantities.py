@@ -1,6 +1,11 @@
 
 
 from arenz_group_python import Quantity_Value_Unit as QVU
+from arenz_group_python import QuantityArray
+from arenz_group_python.data_treatment.util import parse_unit, symbols
+import gc
+import numpy as np
+import pickle
 #"import inc_dec    # "The code to test
 import unittest   # The test framework
 
@@ -16,6 +21,32 @@ class Test_Quantity_Value_Unit(unittest.TestCase):
         self.assertEqual(QVU(5,"m","q").quantity, "q")
         self.assertEqual(QVU(5,"m","q").unit, "m")
 
+    def test_unit_signature(self):
+        self.assertIs(QVU("1 m s^-1")._unit, QVU(2, "m /s")._unit)
+        self.assertEqual(QVU(1, "m s")._unit, QVU(1, "s m")._unit)
+        self.assertEqual(hash(QVU(1, "m s")._unit), hash(QVU(1, "s m")._unit))
+        self.assertEqual((QVU(1, "m s") + QVU(1, "s m")).value, 2.0)
+        self.assertEqual((a / a).unit, "")
+        q = pickle.loads(pickle.dumps(c * a))
+        self.assertIs(q._unit, (c * a)._unit)
+        self.assertEqual(QVU(1, "")._unit, QVU(1)._unit)
+
+    def test_unused_signature_is_released(self):
+        items = (("unused_unit", 1.0),)
+        r = symbols._from_items(items)
+        self.assertIs(symbols._from_items(items), r)
+        del r
+        gc.collect()
+        self.assertNotIn(items, symbols._interned)
+
+    def test_parse_unit_cache(self):
+        QVU("1.5 mV^2 kg")
+        info = parse_unit.cache_info()
+        for i in range(100):
+            self.assertEqual(QVU(f"{i} mV^2 kg").unit, "mV^2 kg")
+        self.assertEqual(parse_unit.cache_info().misses, info.misses)
+        self.assertEqual(parse_unit.cache_info().hits, info.hits + 100)
+
     def test_add(self):
         q = a+b
         self.assertEqual(q.value, 7.0)
@@ -57,6 +88,53 @@ class Test_Quantity_Value_Unit(unittest.TestCase):
         with self.assertRaises(Exception):
             a**dict
         
+
+class Test_units(unittest.TestCase):
+    def test_to(self):
+        self.assertAlmostEqual(QVU("1500 mV").to("V").value, 1.5)
+        self.assertEqual(QVU("1500 mV").to("V").unit, "V")
+        self.assertAlmostEqual(QVU("25 °C").to("K").value, 298.15)
+        self.assertAlmostEqual(QVU("2 bar").to("kPa").value, 200.0)
+        self.assertAlmostEqual(QVU("120 rpm").to("Hz").value, 2.0)
+        self.assertAlmostEqual(QVU("6 °C /min").to("K s^-1").value, 0.1)
+        with self.assertRaises(ValueError):
+            QVU("1 V").to("A")
+
+    def test_add_compatible(self):
+        q = QVU("1 V") + QVU("500 mV")
+        self.assertAlmostEqual(q.value, 1.5)
+        self.assertEqual(q.unit, "V")
+        self.assertAlmostEqual((QVU("1 min") - QVU("30 s")).value, 0.5)
+        qa = QuantityArray([1, 2], "m") + QVU("1 mm")
+        np.testing.assert_allclose(qa.values, [1.001, 2.001])
+        np.testing.assert_allclose(QuantityArray([300, 400], "K").to("°C").values, [26.85, 126.85])
+
+
+class Test_QuantityArray(unittest.TestCase):
+    def test_create(self):
+        qa = QuantityArray.from_quantities([QVU("1 m"), QVU("2 m"), QVU("3 m")])
+        self.assertEqual(qa.unit, "m")
+        self.assertEqual(len(qa), 3)
+        self.assertEqual(qa[1].value, 2.0)
+        self.assertEqual([q.value for q in qa.to_quantities()], [1.0, 2.0, 3.0])
+        with self.assertRaises(ValueError):
+            QuantityArray.from_quantities([a, c])
+
+    def test_arithmetic(self):
+        qa = QuantityArray([1, 2, 3], "m")
+        np.testing.assert_allclose((qa + qa).values, [2, 4, 6])
+        np.testing.assert_allclose((qa - b).values, [-1, 0, 1])
+        self.assertEqual((b + qa).unit, "m")
+        self.assertEqual((qa * c).unit, "m s")
+        self.assertEqual((qa / c).unit, "m s^-1")
+        self.assertEqual((c / qa).unit, "s m^-1")
+        self.assertEqual((qa ** 2).unit, "m^2")
+        np.testing.assert_allclose((2 * qa).values, [2, 4, 6])
+        with self.assertRaises(ValueError):
+            qa + c
+        with self.assertRaises(TypeError):
+            qa + 1
+
         
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,52 @@
+
+from arenz_group_python.data_treatment.util_filter import clean_outliers, rolling_mean_std, rolling_median_mad
+import numpy as np
+import unittest   # The test framework
+
+
+def clean_outliers_loop(data, window_size, threshold):
+    """The original per sample implementation."""
+    clean_data = data.copy()
+    half_window = window_size // 2
+    for i in range(len(data)):
+        start = max(0, i - half_window)
+        end = min(len(data), i + half_window)
+        window = data[start:end]
+        mean_val = np.mean(window)
+        std_val = np.std(window)
+        if np.abs(data[i] - mean_val) > threshold * std_val:
+            clean_data[i] = mean_val
+    return clean_data
+
+
+rng = np.random.default_rng(1)
+data = 300.0 + np.cumsum(rng.normal(0, 0.1, 2000))
+data[rng.integers(0, len(data), 40)] += 25.0
+
+
+class Test_util_filter(unittest.TestCase):
+    def test_mean_std(self):
+        mean, std = rolling_mean_std(data, 20)
+        for i in [0, 1, 9, 10, 500, len(data) - 10, len(data) - 1]:
+            window = data[max(0, i - 10):min(len(data), i + 10)]
+            self.assertAlmostEqual(mean[i], np.mean(window), places=8)
+            self.assertAlmostEqual(std[i], np.std(window), places=6)
+
+    def test_clean_outliers_same_as_loop(self):
+        for window_size in [4, 5, 20, 51]:
+            np.testing.assert_allclose(clean_outliers(data, window_size, 1), clean_outliers_loop(data, window_size, 1))
+
+    def test_median(self):
+        median, mad = rolling_median_mad(data, 20)
+        i = 100
+        window = data[90:110]
+        self.assertAlmostEqual(median[i], np.median(window))
+        self.assertAlmostEqual(mad[i], np.median(np.abs(window - np.median(window))))
+        cleaned = clean_outliers(data, 20, 3, method="median")
+        self.assertLess(np.max(np.abs(np.diff(cleaned))), 10.0)
+        with self.assertRaises(ValueError):
+            clean_outliers(data, 20, 3, method="mode")
+
+
+if __name__ == '__main__':
+    unittest.main()